@@ -0,0 +1,17 @@
+# -*- coding:utf-8 -*-
+
+# usage: headless.py [max_frames [fps]]
+# runs without a window. fps 0 runs uncapped
+
+import sys
+import time
+import rpg
+from rpg.constants import *
+
+max_frames = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_FRAMES
+fps = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+start = time.time()
+frames = rpg.main(headless = True, fps = fps, max_frames = max_frames)
+elapsed = time.time() - start
+print '%d frames in %.2fs (%.1f fps)' % (frames, elapsed, frames / elapsed)
@@ -0,0 +1,20 @@
+# -*- coding:utf-8 -*-
+
+# usage: replay.py recording [fps]
+# replays a session recorded with RPG_RECORD=recording without a window. fps 0 runs uncapped
+
+import sys
+import time
+import rpg
+import rpg.event
+
+if len(sys.argv) < 2:
+    sys.exit('usage: replay.py recording [fps]')
+fps = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+start = time.time()
+frames = rpg.main(headless = True, fps = fps, replay = sys.argv[1])
+elapsed = time.time() - start
+print '%d frames in %.2fs (%.1f fps)' % (frames, elapsed, frames / elapsed)
+for name, stats in sorted(rpg.event.get_dispatch_stats().items()):
+    print '%-16s %6d events %8.1f ms' % (name, stats['count'], stats['ms'])
@@ -1,38 +1,61 @@
 # -*- coding:utf-8 -*-
 
+import os
 import sys
 import pygame
 from pygame.locals import *
 from rpg.constants import *
-import win32gui
 import rpg.event
+import rpg.loop
 import rpg.scene
+import rpg.preload
+import rpg.record
+import rpg.resource
 import rpg.title
 
+try:
+    import win32gui
+except ImportError:
+    win32gui = None
+
 # main
 
-def main():
+def main(headless = HEADLESS, fps = FPS, max_frames = MAX_FRAMES, loop = LOOP_MODE, record = RECORD_FILE, replay = REPLAY_FILE):
+    """run the game. returns the number of frames when max_frames is reached.
+    a replay runs lockstep on the recorded clock and stops after its last frame"""
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
     pygame.init()
 
-    win32gui.MoveWindow(
-        pygame.display.get_wm_info()['window'],
-        SCREEN_RECT.left, SCREEN_RECT.top,
-        SCREEN_RECT.width, SCREEN_RECT.height,
-        1
-    )
+    if win32gui and not headless:
+        win32gui.MoveWindow(
+            pygame.display.get_wm_info()['window'],
+            SCREEN_RECT.left, SCREEN_RECT.top,
+            SCREEN_RECT.width, SCREEN_RECT.height,
+            1
+        )
 
-    screen = pygame.display.set_mode(SCREEN_RECT.size)
+    # the dummy driver defaults to 8 bit
+    screen = pygame.display.set_mode(SCREEN_RECT.size, 0, 32 if headless else 0)
     pygame.display.set_caption('pre-rpg')
 
+    rpg.resource.rescan()
+    rpg.preload.start()
+
     rpg.event.add_listener(QUIT, lambda event: sys.exit(0))
 
+    if replay:
+        replayer = rpg.record.start_replay(replay)
+        max_frames = min(max_frames or replayer.get_frames(), replayer.get_frames())
+        loop = 'lockstep'
+    elif record:
+        rpg.record.start_recording(record)
+
     rpg.scene.set_scene(rpg.title.TitleScene)
 
-    clock = pygame.time.Clock()
-    while True:
-        clock.tick(FPS)
-        try:
-            rpg.event.poll()
-            rpg.scene.do()
-        except rpg.scene.SceneSwitchException, e:
-            rpg.scene.set_scene(e.scene)
+    try:
+        if loop == 'fixed':
+            return rpg.loop.fixed_step(fps, max_frames)
+        return rpg.loop.lockstep(fps, max_frames)
+    finally:
+        rpg.record.stop()
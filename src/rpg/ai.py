@@ -0,0 +1,182 @@
+# -*- coding:utf-8 -*-
+
+"rpg.ai - enemy commands chosen by expectimax search over compact battle snapshots"
+
+import time
+import collections
+from rpg.constants import *
+import rpg.skill
+
+# hp per character slot, ep per team (players, enemies), actor slot (-1 when the battle is over)
+# and the last actor slot of each team (-1 for none). slots follow Stage.get_characters()
+Snapshot = collections.namedtuple('Snapshot', 'hps eps actor last_actors')
+
+WIN = 1000.0
+
+class Roster(object):
+    "what does not change during a battle: teams, traits, max hp and commands of each slot"
+
+    def __init__(self, stage):
+        self.characters = stage.get_characters()
+        self.players = len(stage.get_players())
+        self.teams = tuple([0 if character.is_player() else 1 for character in self.characters])
+        self.max_hps = tuple([character.get_max_hp() for character in self.characters])
+        self.traits = tuple([frozenset([trait.name for trait in character.get_traits()]) for character in self.characters])
+        self.commands = tuple([
+            tuple([(command.name, command.get_ep_cost(), command.get_target_type()) + command.get_damage() for command in character.get_commands()])
+            for character in self.characters
+        ])
+        self.key = (self.teams, self.max_hps, self.traits, self.commands)
+
+    def team_slots(self, team):
+        return range(0, self.players) if team == 0 else range(self.players, len(self.characters))
+
+    def snapshot(self, stage):
+        slots = dict([(character, slot) for slot, character in enumerate(self.characters)])
+        actor = stage.get_actor()
+        last_actors = [stage.last_actors[TEAM_PLAYER], stage.last_actors[TEAM_ENEMY]]
+        return Snapshot(
+            tuple([character.get_hp() for character in self.characters]),
+            (stage.get_ep(TEAM_PLAYER), stage.get_ep(TEAM_ENEMY)),
+            slots[actor] if actor else -1,
+            tuple([slots[character] if character else -1 for character in last_actors])
+        )
+
+    def moves(self, state):
+        "(command index, target slots) the actor can take. index None passes"
+        team = self.teams[state.actor]
+        rivals = tuple([slot for slot in self.team_slots(1 - team) if state.hps[slot] > 0])
+        moves = []
+        for index, (name, cost, target_type, damage, attr) in enumerate(self.commands[state.actor]):
+            if cost > state.eps[team]: continue
+            if target_type == TARGET_ONE:
+                moves.extend([(index, (rival, )) for rival in rivals])
+            elif target_type == TARGET_TEAM:
+                moves.append((index, rivals))
+            else:
+                moves.append((index, ()))
+        return moves or [(None, ())]
+
+    def apply(self, state, (index, targets)):
+        "state at the next decision: Command.do, Stage.finalize_turn and Stage.initialize_turn"
+        actor = state.actor
+        team = self.teams[actor]
+        hps = list(state.hps)
+        eps = list(state.eps)
+
+        if index is not None:
+            name, cost, target_type, damage, attr = self.commands[actor][index]
+            eps[team] -= cost
+            for target in targets:
+                value = rpg.skill.modify_damage_value(
+                    damage, attr, self.traits[actor].__contains__, self.traits[target].__contains__, eps[team]
+                ) if damage else 0
+                if value > 0:
+                    hps[target] = max(hps[target] - value, 0)
+
+        if self.is_end(hps):
+            return Snapshot(tuple(hps), tuple(eps), -1, state.last_actors)
+
+        last_actors = list(state.last_actors)
+        last_actors[team] = actor
+        friends = self.team_slots(1 - team)
+        next_actor = last_actors[1 - team] if last_actors[1 - team] >= 0 else friends[-1]
+        while True:
+            next_actor = friends[(friends.index(next_actor) + 1) % len(friends)]
+            if hps[next_actor] > 0: break
+        if 'recover_ep' in self.traits[next_actor]:
+            eps[1 - team] += 1
+        return Snapshot(tuple(hps), tuple(eps), next_actor, tuple(last_actors))
+
+    def is_end(self, hps):
+        return not any([hp > 0 for hp in hps[:self.players]]) or not any([hp > 0 for hp in hps[self.players:]])
+
+    def evaluate(self, state, team):
+        "remaining hp ratio of team minus that of its rivals, WIN when the battle is decided"
+        own = sum([float(state.hps[slot]) / self.max_hps[slot] for slot in self.team_slots(team)])
+        rival = sum([float(state.hps[slot]) / self.max_hps[slot] for slot in self.team_slots(1 - team)])
+        if not rival: return WIN
+        if not own: return -WIN
+        return own - rival + 0.01 * (state.eps[team] - state.eps[1 - team])
+
+    def create_command(self, state, move):
+        character = self.characters[state.actor]
+        index, targets = move
+        if index is None:
+            command = rpg.skill.DefaultCommand()
+            command.set_name('pass')
+            command.set_label('pass')
+            command.set_actor(character)
+        else:
+            command = character.get_commands()[index]
+        command.set_targets([self.characters[target] for target in targets])
+        return command
+
+
+class Timeout(Exception):
+    pass
+
+class SearchAI(object):
+    """expectimax: the moving team takes its best move, rivals are expected to move at random.
+    deepens one turn at a time until the time budget runs out"""
+
+    def __init__(self, budget = AI_TIME_BUDGET, max_depth = AI_MAX_DEPTH, table_size = AI_TABLE_SIZE):
+        self.budget = budget
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.table = {}
+        self.table_key = None
+        self.stats = { 'decisions': 0, 'nodes': 0, 'hits': 0, 'depth': 0, 'timeouts': 0 }
+
+    def create_command(self, stage):
+        roster = Roster(stage)
+        state = roster.snapshot(stage)
+        return roster.create_command(state, self.search(roster, state))
+
+    def search(self, roster, state):
+        self.stats['decisions'] += 1
+        # values only hold for the roster they were searched with
+        if len(self.table) > self.table_size or roster.key != self.table_key:
+            self.table.clear()
+            self.table_key = roster.key
+        self.deadline = time.time() + self.budget / 1000.0
+
+        team = roster.teams[state.actor]
+        moves = roster.moves(state)
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                values = [self.value(roster, roster.apply(state, move), depth - 1, team, depth > 1) for move in moves]
+            except Timeout:
+                self.stats['timeouts'] += 1
+                break
+            best = moves[values.index(max(values))]
+            self.stats['depth'] = depth
+        return best
+
+    def value(self, roster, state, depth, team, timed):
+        if state.actor < 0 or depth == 0:
+            return roster.evaluate(state, team)
+
+        key = (state, depth, team)
+        if key in self.table:
+            self.stats['hits'] += 1
+            return self.table[key]
+        if timed and time.time() > self.deadline:
+            raise Timeout()
+        self.stats['nodes'] += 1
+
+        values = [self.value(roster, roster.apply(state, move), depth - 1, team, timed) for move in roster.moves(state)]
+        if roster.teams[state.actor] == team:
+            value = max(values)
+        else:
+            value = sum(values) / len(values)
+        self.table[key] = value
+        return value
+
+
+def create(name):
+    "enemy ai for ENEMY_AI. rule leaves commands to the stage"
+    if name == 'search':
+        return SearchAI()
+    return None
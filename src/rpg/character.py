@@ -12,10 +12,15 @@ import rpg.event
 import rpg.skill
 
 
+class DamagedEvent(rpg.event.TypedEvent):
+    __slots__ = ('hp_before_damage', 'damage')
+    pool = []
+
 class Character(rpg.event.EventDispatcher):
 
     JOB_CHANGED = 'job_changed'
     DAMAGED = 'damaged'
+    event_classes = { DAMAGED: DamagedEvent }
 
     def __init__(self, index, name, job, sex):
         super(Character, self).__init__()
@@ -191,13 +196,13 @@ class CharacterView(rpg.sprite.Group):
         # for interval
         self._is_transforming = False;
 
-        self.intermission_sprite = rpg.sprite.AnimationSprite(self.character.name + '_walk.png', 4)
+        self.intermission_sprite = rpg.sprite.AnimationSprite(self.character.name + '_walk.png')
         self.intermission_sprite.rect.midbottom = self.sprite.rect.midbottom
 
-        self.transform_sprite = rpg.sprite.AnimationSprite(self.character.name + '_vanish.png', 7, fps = 15, repeat=False)
+        self.transform_sprite = rpg.sprite.AnimationSprite(self.character.name + '_vanish.png')
         self.transform_sprite.rect.midbottom = self.sprite.rect.midbottom
 
-        self.untransform_sprite = rpg.sprite.AnimationSprite(self.character.name + '_appear.png', 7, fps = 15, repeat=False)
+        self.untransform_sprite = rpg.sprite.AnimationSprite(self.character.name + '_appear.png')
         self.untransform_sprite.rect.midbottom = self.sprite.rect.midbottom
 
     def get_sprite(self):
@@ -207,11 +212,10 @@ class CharacterView(rpg.sprite.Group):
         return False
 
     def on_job_change(self, *args):
-        self.sprite.image = rpg.resource.job_image(self.character.get_job(), self.character.get_sex())
+        self.sprite.image = rpg.resource.job_image(self.character.get_job(), self.character.get_sex(), self.is_flipped())
         self.sprite.rect = self.sprite.image.get_rect()
         self.sprite.rect.midbottom = (100, 110 + self.character.index * 100)
         if self.is_flipped():
-            self.sprite.image = pygame.transform.flip(self.sprite.image, True, False)
             self.sprite.rect.centerx = SCREEN_RECT.width - self.sprite.rect.centerx
 
     def on_damaged(self, event):
@@ -245,6 +249,7 @@ class CharacterView(rpg.sprite.Group):
     def update_parameters(self):
         image = self.parameters_sprite.image
         image.fill(COLOR_BACKGROUND)
+        self.parameters_sprite.set_dirty()
 
         hp_bar_width = 30
         hp_bar_y = image.get_height() - 1
@@ -271,12 +276,12 @@ class CharacterView(rpg.sprite.Group):
             hp_remain_rate = float(displayed_hp - damage) / self.character.get_max_hp()
             pygame.draw.line(image, COLOR_REMAIN_HP, (0, hp_bar_y), (math.floor(hp_remain_rate * hp_bar_width), hp_bar_y))
 
-        hp_label = rpg.resource.font(small = True).render('%d' % displayed_hp, False, COLOR_FOREGROUND)
+        hp_label = rpg.resource.text('%d' % displayed_hp, COLOR_FOREGROUND, small = True)
         image.blit(hp_label, (0, hp_bar_y - 11))
 
         if damage:
             image.blit(
-                rpg.resource.font(small = True).render(' - %d' % damage, False, damage_color),
+                rpg.resource.text(' - %d' % damage, damage_color, small = True),
                 (hp_label.get_width(), hp_bar_y - 11)
             )
         # elif self.hp_change > 0
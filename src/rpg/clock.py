@@ -0,0 +1,59 @@
+# -*- coding:utf-8 -*-
+
+"rpg.clock - game time in ms, sampled once per frame and read by everything time based"
+
+import pygame
+from rpg.constants import *
+
+MODE_REALTIME = 'realtime'  # follows the wall clock, scaled by speed
+MODE_FIXED = 'fixed'  # every tick advances by step * speed
+MODE_MANUAL = 'manual'  # only advance() and set_ticks() move time
+
+mode = CLOCK_MODE
+speed = CLOCK_SPEED
+step = CLOCK_STEP
+now = 0.0
+last_real = None
+
+def tick():
+    "sample time for a new frame. call once per frame before updating"
+    global now, last_real
+    if mode == MODE_REALTIME:
+        real = pygame.time.get_ticks()
+        if last_real is not None:
+            now += (real - last_real) * speed
+        last_real = real
+    elif mode == MODE_FIXED:
+        now += step * speed
+    return now
+
+def advance(ms):
+    global now
+    now += ms
+    return now
+
+def set_ticks(ms):
+    global now
+    now = ms
+    return now
+
+def get_ticks():
+    "game time of the current frame"
+    return now
+
+def set_mode(new_mode, new_step = None):
+    global mode, step, last_real
+    if new_mode not in (MODE_REALTIME, MODE_FIXED, MODE_MANUAL):
+        raise ValueError('unknown clock mode %s' % new_mode)
+    mode = new_mode
+    if new_step: step = new_step
+    last_real = None
+
+def set_speed(new_speed):
+    global speed
+    speed = new_speed
+
+def reset():
+    global now, last_real
+    now = 0.0
+    last_real = None
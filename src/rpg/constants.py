@@ -31,19 +31,64 @@ TARGET_TEAM = 'team'
 DAMAGE_PHYSIC = 1
 DAMAGE_MAGIC = 1 << 1
 
+ACTION_OK = 1
+ACTION_CANCEL = 1 << 1
+ACTION_ESCAPE = 1 << 2
+ACTION_NEXT = 1 << 3
+ACTION_PREV = 1 << 4
+ACTION_UP = 1 << 5
+ACTION_DOWN = 1 << 6
+ACTION_LEFT = 1 << 7
+ACTION_RIGHT = 1 << 8
+
 
 
 # application setting
 
 SCREEN_RECT = pygame.rect.Rect(100, 100, 480, 360)
-FPS = 60
+FPS = int(os.environ.get('RPG_FPS', 60))  # 0 runs uncapped
+HEADLESS = bool(os.environ.get('RPG_HEADLESS'))  # dummy video driver, no window
+MAX_FRAMES = int(os.environ.get('RPG_MAX_FRAMES', 0))  # 0 runs until quit
+CLOCK_MODE = os.environ.get('RPG_CLOCK', 'realtime')  # realtime, fixed or manual
+CLOCK_SPEED = float(os.environ.get('RPG_CLOCK_SPEED', 1))
+CLOCK_STEP = 1000.0 / 60  # ms per tick in fixed mode
+LOOP_MODE = os.environ.get('RPG_LOOP', 'lockstep')  # lockstep or fixed
+LOOP_MAX_STEPS = 5  # logic steps per frame before the loop gives up catching up
+LOOP_MAX_SKIPPED_RENDERS = 2  # renders in a row skipped while behind
+RECORD_FILE = os.environ.get('RPG_RECORD')  # record the input of the session here
+REPLAY_FILE = os.environ.get('RPG_REPLAY')  # replay a recorded session instead of reading input
+ENEMY_AI = os.environ.get('RPG_ENEMY_AI', 'rule')  # rule or search
+AI_TIME_BUDGET = 8  # ms of search per enemy decision, kept under a frame
+AI_MAX_DEPTH = 8  # turns searched ahead
+AI_TABLE_SIZE = 100000  # transposition table entries kept between decisions
 RESOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'resource')
+IMAGE_CACHE_BUDGET = 16 * 1024 * 1024  # bytes of decoded surfaces
+TEXT_CACHE_BUDGET = 1024 * 1024  # bytes of rendered text
+GLYPH_ATLAS_WIDTH = 512
+ROUNDED_BOX_MEMO = 32  # number of assembled rounded boxes kept by size
+DIRTY_RENDERING = True
+DIRTY_FULL_REDRAW_RATIO = 0.5  # redraw whole screen when dirty area exceeds this
+CLICKABLE_GRID_SIZE = 32  # cell size of the hit-testing grid in pixels
+PRELOAD_THREADS = 4
+PRELOAD_FRAME_BUDGET = 4  # ms per frame spent finishing preloaded assets
+EVENT_POOL_SIZE = 16  # spare instances kept by each pooled event class
 
 OK_KEYS = set((K_RETURN, K_x))
 CANCEL_KEYS = set((K_BACKSPACE, K_z))
 ESCAPE_KEYS = set((K_ESCAPE, ))
 NEXT_KEYS = set((K_s, ))
 PREV_KEYS = set((K_a, ))
+ACTION_KEYS = {
+    ACTION_OK: OK_KEYS,
+    ACTION_CANCEL: CANCEL_KEYS,
+    ACTION_ESCAPE: ESCAPE_KEYS,
+    ACTION_NEXT: NEXT_KEYS,
+    ACTION_PREV: PREV_KEYS,
+    ACTION_UP: set((K_UP, )),
+    ACTION_DOWN: set((K_DOWN, )),
+    ACTION_LEFT: set((K_LEFT, )),
+    ACTION_RIGHT: set((K_RIGHT, )),
+}
 
 COLOR_BACKGROUND = Color(255, 255, 255)
 COLOR_FOREGROUND = Color(0, 0, 0)
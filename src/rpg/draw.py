@@ -1,11 +1,96 @@
 # -*- coding:utf-8 -*-
 
 import math
+import collections
 import pygame
 from pygame.locals import *
+from rpg.constants import *
 
-# http://www.mail-archive.com/pygame-users@seul.org/msg06800.html
 def rounded_rect(
+    surface,
+    rect,
+    width = 1, roundedness = 1,
+    border_color = (0,0,0), fill_color = (255,255,255)
+):
+    rect = Rect(rect)
+    if min(rect.size) < roundedness * 2:
+        # degenerate boxes overflow their rect
+        draw_rounded_rect(surface, rect, width, roundedness, border_color, fill_color)
+        return
+    surface.blit(rounded_box(rect.size, width, roundedness, border_color, fill_color), rect)
+
+
+# boxes are assembled from nine-slice templates, one per style.
+# recently used sizes are kept as whole boxes.
+templates = {}
+boxes = collections.OrderedDict()
+box_stats = { 'hits': 0, 'assembled': 0, 'templates': 0 }
+
+def rounded_box(size, width = 1, roundedness = 1, border_color = (0,0,0), fill_color = (255,255,255)):
+    "rounded box surface with a colorkey outside the corners. shared, dont modify it"
+    style = (width, roundedness, tuple(border_color)[:3], tuple(fill_color)[:3])
+    key = (tuple(size), style)
+    if key in boxes:
+        box_stats['hits'] += 1
+        box = boxes.pop(key)
+        boxes[key] = box
+        return box
+
+    box = assemble_box(size, style)
+    boxes[key] = box
+    if len(boxes) > ROUNDED_BOX_MEMO:
+        boxes.popitem(last = False)
+    box_stats['assembled'] += 1
+    return box
+
+def get_box_stats():
+    stats = dict(box_stats)
+    stats['count'] = len(boxes)
+    return stats
+
+def assemble_box((box_width, box_height), style):
+    template = get_template(style)
+    corner = style[1] + 1
+    end = template.get_width() - corner
+    if box_width <= corner * 2 or box_height <= corner * 2:
+        return draw_box((box_width, box_height), style)
+
+    box = pygame.Surface((box_width, box_height), 0, template)
+    box.fill(template.get_colorkey())
+    box.set_colorkey(template.get_colorkey(), RLEACCEL)
+    center = (box_width - corner * 2, box_height - corner * 2)
+
+    box.blit(template, (0, 0), (0, 0, corner, corner))
+    box.blit(template, (box_width - corner, 0), (end, 0, corner, corner))
+    box.blit(template, (0, box_height - corner), (0, end, corner, corner))
+    box.blit(template, (box_width - corner, box_height - corner), (end, end, corner, corner))
+
+    box.blit(pygame.transform.scale(template.subsurface((corner, 0, 1, corner)), (center[0], corner)), (corner, 0))
+    box.blit(pygame.transform.scale(template.subsurface((corner, end, 1, corner)), (center[0], corner)), (corner, box_height - corner))
+    box.blit(pygame.transform.scale(template.subsurface((0, corner, corner, 1)), (corner, center[1])), (0, corner))
+    box.blit(pygame.transform.scale(template.subsurface((end, corner, corner, 1)), (corner, center[1])), (box_width - corner, corner))
+
+    box.fill(template.get_at((corner, corner)), (corner, corner, center[0], center[1]))
+    return box
+
+def get_template(style):
+    if style not in templates:
+        corner = style[1] + 1
+        templates[style] = draw_box((corner * 2 + 1, corner * 2 + 1), style)
+        box_stats['templates'] += 1
+    return templates[style]
+
+def draw_box(size, (width, roundedness, border_color, fill_color)):
+    for colorkey in [(255, 0, 255), (0, 255, 0), (0, 0, 255)]:
+        if colorkey not in (border_color, fill_color): break
+    box = pygame.Surface(size, 0, 32)
+    box.fill(colorkey)
+    box.set_colorkey(colorkey, RLEACCEL)
+    draw_rounded_rect(box, (0, 0) + tuple(size), width, roundedness, border_color, fill_color)
+    return box
+
+# http://www.mail-archive.com/pygame-users@seul.org/msg06800.html
+def draw_rounded_rect(
     surface,
     (posx, posy, dimensionx, dimensiony),
     width = 1, roundedness = 1,
@@ -2,66 +2,133 @@
 
 "rpg.event - handle ui events"
 
+import time
 import pygame.event
 from pygame.locals import *
+from rpg.constants import *
+import rpg.input
+import rpg.record
 
+# listener sets are the registry. poll iterates tuples that are rebuilt only when a set changes,
+# so listeners added or removed during dispatch take effect from the next event
 listeners = {}
+listener_tables = {}
+version = 0
 
-down_keys = set()
-up_keys = set()
-pressed_keys = set()
+# type: [dispatched events, seconds spent in listeners]
+dispatch_stats = {}
+
+# only types with listeners are queued. keys are always tracked for rpg.input
+ALWAYS_ALLOWED = (QUIT, KEYDOWN, KEYUP)
+allowed_version = None
+
+# sampled once a poll, or replayed, so clicks and hovers follow recordings
+mouse_pos = (0, 0)
+
+queue_stats = { 'polls': 0, 'events': 0, 'dispatched': 0, 'coalesced': 0, 'last_depth': 0, 'max_depth': 0 }
 
 def add_listener(type, listener):
+    if listener in listeners.get(type, ()): return
     listeners.setdefault(type, set()).add(listener)
+    update_table(type)
 
 def remove_listener(type, listener):
-    if type not in listeners: return
-    safe_remove(listeners[type], listener)
+    if listener not in listeners.get(type, ()): return
+    listeners[type].remove(listener)
     if len(listeners[type]) == 0:
         del listeners[type]
+    update_table(type)
 
-def is_key_down(*keys):
-    for key in keys:
-        if key in down_keys: return True
-    return False
-
-def is_key_up(*keys):
-    for key in keys:
-        if key in up_keys: return True
-    return False
-
-def is_key_pressed(*keys):
-    for key in keys:
-        if key in pressed_keys: return True
-    return False
+def update_table(type):
+    global version
+    version += 1
+    if type in listeners:
+        listener_tables[type] = tuple(listeners[type])
+    else:
+        del listener_tables[type]
 
+def get_listeners(type):
+    return listener_tables.get(type, ())
 
 def poll():
     "get events from queue. call in main loop"
-
-    global down_keys, up_keys, pressed_keys
-
-    down_keys = set()
-    up_keys = set()
-
-    for event in pygame.event.get():
+    global mouse_pos
+
+    rpg.input.begin_frame()
+
+    if allowed_version != version:
+        update_allowed()
+
+    events = pygame.event.get()
+    if rpg.record.replayer:
+        events, mouse_pos = rpg.record.replayer.next(events)
+    else:
+        mouse_pos = pygame.mouse.get_pos()
+        if rpg.record.recorder:
+            rpg.record.recorder.record(events, mouse_pos)
+    queue_stats['polls'] += 1
+    queue_stats['events'] += len(events)
+    queue_stats['last_depth'] = len(events)
+    queue_stats['max_depth'] = max(queue_stats['max_depth'], len(events))
+    events = coalesce_motion(events)
+    queue_stats['coalesced'] += queue_stats['last_depth'] - len(events)
+    queue_stats['dispatched'] += len(events)
+
+    for event in events:
         if event.type == KEYDOWN:
-            down_keys.add(event.key)
-            #safe_remove(up_keys, event.key)
-            pressed_keys.add(event.key)
+            rpg.input.key_down(event.key)
         elif event.type == KEYUP:
-            #safe_remove(down_keys, event.key)
-            up_keys.add(event.key)
-            safe_remove(pressed_keys, event.key)
+            rpg.input.key_up(event.key)
 
-        # avoid change during iteration
-        for listener in set(listeners.get(event.type, set())):
+        table = listener_tables.get(event.type)
+        if not table: continue
+        start = time.time()
+        for listener in table:
             listener(event)
-
-
-# utility functions
-def safe_remove(container, item):
-    if item in container: container.remove(item)
+        stats = dispatch_stats.setdefault(event.type, [0, 0.0])
+        stats[0] += 1
+        stats[1] += time.time() - start
+
+def get_mouse_pos():
+    "mouse position as of the last poll"
+    return mouse_pos
+
+def coalesce_motion(events):
+    "consecutive MOUSEMOTION events as one at the latest position with the summed rel"
+    coalesced = []
+    for event in events:
+        if event.type == MOUSEMOTION and coalesced and coalesced[-1].type == MOUSEMOTION:
+            last = coalesced[-1]
+            event = pygame.event.Event(
+                MOUSEMOTION,
+                pos = event.pos,
+                rel = (last.rel[0] + event.rel[0], last.rel[1] + event.rel[1]),
+                buttons = event.buttons
+            )
+            coalesced[-1] = event
+        else:
+            coalesced.append(event)
+    return coalesced
+
+def update_allowed():
+    "let only event types with listeners into the queue"
+    global allowed_version
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(list(set(ALWAYS_ALLOWED) | set(listener_tables)))
+    allowed_version = version
+
+def get_queue_stats():
+    return dict(queue_stats)
+
+def get_dispatch_stats():
+    "dispatched events and ms spent in listeners by event name"
+    return dict([
+        (pygame.event.event_name(type), { 'count': count, 'ms': seconds * 1000 })
+        for type, (count, seconds) in dispatch_stats.items()
+    ])
+
+def clear_dispatch_stats():
+    dispatch_stats.clear()
 
 
 
@@ -70,7 +137,55 @@ class Event(object):
         self.__dict__.update(kwargs)
 
 
+event_stats = { 'created': 0, 'reused': 0 }
+
+class TypedEvent(object):
+    """event with fixed fields. subclasses add theirs to __slots__.
+    one instance is shared by every listener of a dispatch. pooled classes reuse it afterwards, so dont keep it"""
+
+    __slots__ = ('type', 'target')
+    pool = None  # a list in subclasses that reuse instances
+
+    def __init__(self, type = None, target = None, **fields):
+        self.set(type, target, fields)
+
+    def set(self, type, target, fields):
+        for name in self.slots():
+            setattr(self, name, None)
+        self.type = type
+        self.target = target
+        for name, value in fields.iteritems():
+            setattr(self, name, value)
+
+    @classmethod
+    def slots(cls):
+        if '_slots' not in cls.__dict__:
+            cls._slots = tuple([name for klass in cls.__mro__ for name in klass.__dict__.get('__slots__', ())])
+        return cls._slots
+
+    @classmethod
+    def acquire(cls, type, target, **fields):
+        if cls.pool:
+            event_stats['reused'] += 1
+            event = cls.pool.pop()
+            event.set(type, target, fields)
+            return event
+        event_stats['created'] += 1
+        return cls(type, target, **fields)
+
+    @classmethod
+    def release(cls, event):
+        if cls.pool is not None and len(cls.pool) < EVENT_POOL_SIZE:
+            cls.pool.append(event)
+
+def get_event_stats():
+    return dict(event_stats)
+
+
 class EventDispatcher(object):
+    # event class of each type, TypedEvent when not listed
+    event_classes = {}
+
     def __init__(self):
         self.event_listeners = {}
 
@@ -85,5 +200,11 @@ class EventDispatcher(object):
             del self.event_listeners[type]
 
     def dispatch(self, type, **kwargs):
-        for listener in self.event_listeners.get(type, set()):
-            listener(Event(type = type, target = self, **kwargs))
+        listeners = self.event_listeners.get(type)
+        if not listeners: return
+
+        event_class = self.event_classes.get(type, TypedEvent)
+        event = event_class.acquire(type, self, **kwargs)
+        for listener in listeners:
+            listener(event)
+        event_class.release(event)
@@ -5,6 +5,7 @@ import pygame
 from pygame.locals import *
 from rpg.constants import *
 import rpg.event
+import rpg.input
 import rpg.scene
 import rpg.model
 import rpg.lang
@@ -26,9 +27,8 @@ class IntervalController(rpg.scene.CoroutineController):
         rpg.scene.CoroutineController.__init__(self, scene)
 
         self.navigator = rpg.sprite.AnimationSprite(
-            'arrow.png', 2,
-            (SCREEN_RECT.width / 2, SCREEN_RECT.height / 2 - 10),
-            3
+            'arrow.png',
+            position = (SCREEN_RECT.width / 2, SCREEN_RECT.height / 2 - 10)
         )
 
     def update_generator(self):
@@ -48,7 +48,7 @@ class IntervalController(rpg.scene.CoroutineController):
         self.navigator.rect.centery = self.view(rpg.model.get_player(1)).intermission_sprite.rect.centery
         self.navigator.on_click = rpg.lang.empty_function
 
-        while not rpg.event.is_key_down(K_LEFT) and not self.navigator.is_clicked():
+        while not rpg.input.is_down(ACTION_LEFT) and not self.navigator.is_clicked():
             yield
 
         for player in rpg.model.get_players():
@@ -182,13 +182,13 @@ class CommandSelectController(rpg.scene.Controller):
 
     def update(self):
         select = self.select_box
-        if rpg.event.is_key_down(K_LEFT, *CANCEL_KEYS):
+        if rpg.input.is_down(ACTION_LEFT | ACTION_CANCEL):
             pass
-        elif rpg.event.is_key_down(K_RIGHT, *OK_KEYS):
+        elif rpg.input.is_down(ACTION_RIGHT | ACTION_OK):
             select.select(select.focused_button)
-        elif rpg.event.is_key_down(K_UP):
+        elif rpg.input.is_down(ACTION_UP):
             select.focus(select.up_button(select.focused_button))
-        elif rpg.event.is_key_down(K_DOWN):
+        elif rpg.input.is_down(ACTION_DOWN):
             select.focus(select.down_button(select.focused_button))
 
 
@@ -287,7 +287,7 @@ class TargetSelectController(rpg.scene.Controller):
     def update(self):
         if not self.focused_characters: return
 
-        if rpg.event.is_key_down(*CANCEL_KEYS):
+        if rpg.input.is_down(ACTION_CANCEL):
             self.on_cancel()
 
     def on_click(self, event):
@@ -333,16 +333,16 @@ class OneTargetSelectController(TargetSelectController):
         if not self.get_focused_characters(): return
         focused = self.get_focused_characters()[0]
 
-        if rpg.event.is_key_down(*OK_KEYS):
+        if rpg.input.is_down(ACTION_OK):
             self.select(focused)
 
-        if rpg.event.is_key_down(K_UP):
+        if rpg.input.is_down(ACTION_UP):
             friends = self.get_friends()
             self.focus(friends[(focused.index - 1) % len(friends)], next = False)
-        elif rpg.event.is_key_down(K_DOWN):
+        elif rpg.input.is_down(ACTION_DOWN):
             friends = self.get_friends()
             self.focus(friends[(focused.index + 1) % len(friends)])
-        elif rpg.event.is_key_down(K_RIGHT, K_LEFT):
+        elif rpg.input.is_down(ACTION_RIGHT | ACTION_LEFT):
             rivals = self.get_rivals()
             self.focus(rivals[min([focused.index, len(rivals) - 1])])
 
@@ -376,10 +376,10 @@ class TeamTargetSelectController(TargetSelectController):
         if not self.get_focused_characters(): return
         focused = self.get_focused_characters()[0]
 
-        if rpg.event.is_key_down(*OK_KEYS):
+        if rpg.input.is_down(ACTION_OK):
             self.select(focused.get_team())
 
-        if rpg.event.is_key_down(K_RIGHT, K_LEFT):
+        if rpg.input.is_down(ACTION_RIGHT | ACTION_LEFT):
             self.focus(focused.get_rival_team())
 
     def character_click_handler(self, character):
@@ -414,7 +414,7 @@ class CommandExecuteController(rpg.scene.CoroutineController):
         serif = rpg.sprite.Sprite(pygame.Surface((105, 20)))
         serif.image.fill(COLOR_BACKGROUND)
         rpg.draw.rounded_rect(serif.image, serif.rect)
-        serif.image.blit(rpg.resource.font().render(self.command.label, False, COLOR_FOREGROUND), (5, 3))
+        serif.image.blit(rpg.resource.text(self.command.label, COLOR_FOREGROUND), (5, 3))
         serif.rect.midleft = self.scene.get_view_for(self.command.actor).sprite.rect.center
         serif.rect.left += 30
         return serif
@@ -452,7 +452,7 @@ class WinController(rpg.scene.CoroutineController):
         for enemy in rpg.model.get_stage().get_enemies():
             view = self.view(enemy)
             sprite = view.intermission_sprite
-            sprite.fps = 20
+            sprite.set_fps(20)
             sprite.flip()
             view.walk()
             rpg.sprite.Translate(
@@ -489,7 +489,7 @@ class WinController(rpg.scene.CoroutineController):
 
         while messages:
             for player, message in messages.items():
-                serif = rpg.sprite.Sprite(rpg.resource.font(small = True).render(message.pop(0), False, COLOR_FOREGROUND))
+                serif = rpg.sprite.Sprite(rpg.resource.text(message.pop(0), COLOR_FOREGROUND, small = True))
                 serif.rect.midbottom = self.view(player).sprite.rect.midbottom
                 serif.rect.top -= 65
                 self.add_view(serif)
@@ -541,15 +541,14 @@ class EpView(rpg.sprite.Group):
 
     def draw_team_ep(self, team):
         sprite = self.player_ep if team == TEAM_PLAYER else self.enemy_ep
-        font = rpg.resource.font()
-
         sprite.image.fill(COLOR_BACKGROUND)
-        label = font.render('EP %d' % rpg.model.get_stage().get_ep(team), False, COLOR_FOREGROUND)
+        sprite.set_dirty()
+        label = rpg.resource.text('EP %d' % rpg.model.get_stage().get_ep(team))
         sprite.image.blit(label, (0, 0))
 
         change = self.ep_changes[team]
         if change != 0:
-            change_label = font.render(' %s %d' % ('+' if change > 0 else '-', abs(change)), False, COLOR_USE_EP)
+            change_label = rpg.resource.text(' %s %d' % ('+' if change > 0 else '-', abs(change)), COLOR_USE_EP)
             sprite.image.blit(change_label, (label.get_width(), 0))
 
     def show_ep_change(self, team, ep):
@@ -606,7 +605,7 @@ class WatchCommandEffectController(rpg.scene.CoroutineController):
             sprite.rect.bottomleft = target_view.sprite.rect.midbottom
             sprite.rect.left += 30
         if self.command.actor.is_player() == self.command.targets[0].is_player():
-            sprite.image = pygame.transform.flip(sprite.image, True, False)
+            sprite.image = rpg.resource.flipped(sprite.image)
 
         for i in self.wait_generator(600): yield
 
@@ -1,19 +1,46 @@
 # -*- coding:utf-8 -*-
 
-import Image
+import weakref
 import pygame
 from pygame.locals import *
 from rpg.constants import *
 
+# tinted variants live as long as their source surface
+tints = weakref.WeakKeyDictionary()
+tint_stats = { 'hits': 0, 'created': 0 }
+
 def blend_color(image, color, alpha):
-    mask = Image.new('RGB', image.get_size(), (int(color.r), int(color.g), int(color.b)))
-    blended = Image.blend(pygame_to_pil(image), mask, alpha)
-    blended = pil_to_pygame(blended)
-    blended.set_colorkey(blended.get_at((0, 0)))
-    return blended.convert()
+    "image mixed with color by alpha, keeping its transparency. shared, dont modify it"
+    key = (tuple(color)[:3], alpha)
+    variants = tints.setdefault(image, {})
+    if key in variants:
+        tint_stats['hits'] += 1
+        return variants[key]
+
+    blended = tint(image, key[0], alpha)
+    variants[key] = blended
+    tint_stats['created'] += 1
+    return blended
+
+def tint(image, color, alpha):
+    "new surface with rgb = image * (1 - alpha) + color * alpha. per-pixel alpha is untouched"
+    keep = int(round(255 * (1 - alpha)))
+    add = tuple([int(round(c * alpha)) for c in color])
+
+    blended = image.copy()
+    blended.fill((keep, keep, keep), special_flags = BLEND_RGB_MULT)
+    blended.fill(add, special_flags = BLEND_RGB_ADD)
 
-def pygame_to_pil(image):
-    return Image.fromstring('RGB', image.get_size(), pygame.image.tostring(image, 'RGB'))
+    colorkey = image.get_colorkey()
+    if colorkey:
+        key = pygame.Surface((1, 1), 0, image)
+        key.fill(colorkey)
+        key.fill((keep, keep, keep), special_flags = BLEND_RGB_MULT)
+        key.fill(add, special_flags = BLEND_RGB_ADD)
+        blended.set_colorkey(key.get_at((0, 0)), image.get_flags() & RLEACCEL)
+    return blended
 
-def pil_to_pygame(image):
-    return pygame.image.fromstring(image.tostring(), image.size, 'RGB')
+def get_tint_stats():
+    stats = dict(tint_stats)
+    stats['count'] = sum([len(variants) for variants in tints.values()])
+    return stats
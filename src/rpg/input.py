@@ -1,49 +1,54 @@
 # -*- coding:utf-8 -*-
 
-"rpg.input - handle key inputs"
+"rpg.input - key state as bitmasks of named actions. fed by rpg.event.poll"
 
-import sys
-import pygame
 from pygame.locals import *
 from rpg.constants import *
 
-down_keys = set()
-up_keys = set()
+# actions of each key. a key can trigger several actions
+key_actions = {}
+
+def set_action_keys(action_keys):
+    key_actions.clear()
+    for action, keys in action_keys.items():
+        for key in keys:
+            key_actions[key] = key_actions.get(key, 0) | action
+
+set_action_keys(ACTION_KEYS)
+
+down = 0
+up = 0
+pressed = 0
 pressed_keys = set()
 
-def poll():
-    "get events from queue. call in main loop"
-
-    down_keys = set()
-    up_keys = set()
-
-    for event in pygame.event.get((KEYDOWN, KEYUP)):
-        if event.type == KEYDOWN:
-            down_keys.add(event.key)
-            safe_remove(up_keys, event.key)
-            pressed_keys.add(event.key)
-        elif event.type == KEYUP:
-            safe_remove(down_keys, event.key)
-            up_keys.add(event.key)
-            safe_remove(pressed_keys, event.key)
-
-    expression = str((down_keys, up_keys, pressed_keys))
-    global debug
-    if debug != expression:
-        print expression
-        sys.stdout.flush()
-        debug = expression
-
-def is_down(key):
-    return key in down_keys
-
-def is_up(key):
-    return key in up_keys
-
-def is_pressed(key):
-    return key in pressed_keys
-        
-
-# utility functions
-def safe_remove(container, item):
-    if item in container: container.remove(item)
+def begin_frame():
+    "forget this frame's downs and ups. called by rpg.event.poll"
+    global down, up
+    down = 0
+    up = 0
+
+def key_down(key):
+    global down, pressed
+    pressed_keys.add(key)
+    actions = key_actions.get(key, 0)
+    down |= actions
+    pressed |= actions
+
+def key_up(key):
+    global up, pressed
+    pressed_keys.discard(key)
+    up |= key_actions.get(key, 0)
+    # another held key may keep the action pressed
+    pressed = 0
+    for key in pressed_keys:
+        pressed |= key_actions.get(key, 0)
+
+def is_down(actions):
+    "any of actions, or-ed ACTION_ bits, began this frame"
+    return down & actions != 0
+
+def is_up(actions):
+    return up & actions != 0
+
+def is_pressed(actions):
+    return pressed & actions != 0
@@ -0,0 +1,246 @@
+# -*- coding:utf-8 -*-
+
+"""rpg.kernel - many independent battles as numpy arrays, advanced one turn at a time
+
+Characters start fresh (no exp) and both teams use the random policy of
+rpg.simulate. check() replays the same random numbers through the object
+model and reports the battles that differ.
+
+usage: python -m rpg.kernel [-n BATTLES] [--players villager,cat,witch] [--enemies cat] [--check]
+"""
+
+import time
+import argparse
+import numpy
+from rpg.constants import *
+import rpg.model
+import rpg.character
+import rpg.job
+import rpg.skill
+import rpg.stage
+import rpg.simulate
+
+TRAITS = ['villager', 'nerd', 'magician', 'recover_ep']
+TARGET_TYPES = [TARGET_NONE, TARGET_ONE, TARGET_TEAM]
+INITIAL_EP = 5
+
+
+class Tables(object):
+    "per job and per skill lookup arrays, indexed by position in rpg.job.get_jobs() and rpg.skill.get_skills()"
+
+    def __init__(self):
+        self.jobs = rpg.job.get_jobs()
+        self.skills = [skill for skill in rpg.skill.get_skills() if skill.is_command]
+        skill_index = dict([(skill, i) for i, skill in enumerate(self.skills)])
+
+        self.max_hp = numpy.array([job.max_hp for job in self.jobs])
+        self.traits = numpy.array([
+            sum([1 << bit for bit, trait in enumerate(TRAITS) if job.has_trait(trait)])
+            for job in self.jobs
+        ])
+
+        # command skills of a fresh character of each job, in get_commands() order
+        commands = [
+            [skill_index[skill] for skill in rpg.character.Character(0, '', job, SEX_NONE).get_skills() if skill.is_command]
+            for job in self.jobs
+        ]
+        self.commands = numpy.full((len(self.jobs), max([len(c) for c in commands])), -1)
+        for i, c in enumerate(commands):
+            self.commands[i, :len(c)] = c
+
+        samples = [skill.create_command(None) for skill in self.skills]
+        self.cost = numpy.array([command.get_ep_cost() for command in samples] + [0])
+        self.target_type = numpy.array([TARGET_TYPES.index(command.get_target_type()) for command in samples] + [0])
+        self.damage = numpy.array([command.get_damage()[0] for command in samples] + [0])
+        self.attr = numpy.array([command.get_damage()[1] for command in samples] + [0])
+
+    def job_index(self, name):
+        return self.jobs.index(rpg.job.get_job(name))
+
+    def has_trait(self, traits, name):
+        return (traits >> TRAITS.index(name)) & 1 == 1
+
+
+class Battles(object):
+    "player slots come first, then enemy slots, like Stage.get_characters()"
+
+    def __init__(self, count, player_jobs, enemy_jobs, first_team = TEAM_PLAYER, tables = None):
+        self.tables = tables or Tables()
+        self.players = len(player_jobs)
+        self.size = len(player_jobs) + len(enemy_jobs)
+        self.count = count
+
+        self.job = numpy.tile([self.tables.job_index(job) for job in player_jobs + enemy_jobs], (count, 1))
+        self.team = numpy.array([0] * len(player_jobs) + [1] * len(enemy_jobs))
+        self.hp = self.tables.max_hp[self.job]
+        self.ep = numpy.full((count, 2), INITIAL_EP)
+        self.actor = numpy.full(count, 0 if first_team == TEAM_PLAYER else self.players)
+        self.last_actors = numpy.full((count, 2), -1)
+        self.turns = numpy.zeros(count, int)
+        self.done = numpy.zeros(count, bool)
+
+    def offset(self, team):
+        return numpy.where(team == 0, 0, self.players)
+
+    def team_size(self, team):
+        return numpy.where(team == 0, self.players, self.size - self.players)
+
+    def step(self, uniforms):
+        "one turn of every battle that is not over. uniforms is (count, 2) in [0, 1)"
+        tables = self.tables
+        live = numpy.flatnonzero(~self.done)
+        if not len(live): return
+        rows = numpy.arange(len(live))
+        hp = self.hp[live]
+        ep = self.ep[live]
+        actor = self.actor[live]
+        team = self.team[actor]
+        traits = tables.traits[self.job[live, actor]]
+
+        # Stage.initialize_turn
+        ep[rows, team] += tables.has_trait(traits, 'recover_ep')
+
+        # random_policy: an affordable command, passing when there is none
+        commands = tables.commands[self.job[live, actor]]
+        affordable = (commands >= 0) & (tables.cost[commands] <= ep[rows, team][:, None])
+        choice = kth(affordable, (uniforms[live, 0] * numpy.maximum(affordable.sum(1), 1)).astype(int))
+        skill = numpy.where(affordable.any(1), commands[rows, choice], -1)
+
+        # Command.do pays before the damages are computed
+        ep[rows, team] -= tables.cost[skill]
+
+        alive = hp > 0
+        rivals = alive & (self.team[None, :] != team[:, None])
+        target_type = tables.target_type[skill]
+        one = kth(rivals, (uniforms[live, 1] * rivals.sum(1)).astype(int))
+        targets = numpy.zeros_like(rivals)
+        targets[rows, one] = target_type == 1
+        targets |= rivals & (target_type == 2)[:, None]
+
+        # rpg.skill.modify_damage
+        attr = tables.attr[skill]
+        value = tables.damage[skill].copy()
+        physic = (attr & DAMAGE_PHYSIC) > 0
+        magic = (attr & DAMAGE_MAGIC) > 0
+        value += numpy.where(physic & tables.has_trait(traits, 'villager'), ep[rows, team] // 2, 0)
+        values = numpy.repeat(value[:, None], self.size, 1)
+        nerd = tables.has_trait(tables.traits[self.job[live]], 'nerd')
+        values += numpy.where(physic[:, None] & nerd, values // 2, 0)
+        values += numpy.where((magic & tables.has_trait(traits, 'magician'))[:, None], values // 2, 0)
+
+        hp = numpy.maximum(hp - numpy.where(targets & (values > 0), values, 0), 0)
+
+        # Stage.finalize_turn
+        alive = hp > 0
+        end = ~alive[:, :self.players].any(1) | ~alive[:, self.players:].any(1)
+        self.last_actors[live, team] = actor
+        rival = 1 - team
+        last = self.last_actors[live, rival]
+        start = numpy.where(last >= 0, last, self.offset(rival) + self.team_size(rival) - 1) - self.offset(rival)
+        steps = numpy.arange(1, self.size + 1)
+        candidates = (start[:, None] + steps[None, :]) % self.team_size(rival)[:, None] + self.offset(rival)[:, None]
+        first_alive = numpy.argmax(alive[rows[:, None], candidates], 1)
+
+        self.hp[live] = hp
+        self.ep[live] = ep
+        self.actor[live] = numpy.where(end, -1, candidates[rows, first_alive])
+        self.turns[live] += 1
+        self.done[live] = end
+
+    def run(self, max_turns = rpg.simulate.MAX_TURNS, uniforms = None):
+        "uniforms(turn) gives the random numbers of a turn. default is a seeded numpy stream"
+        if uniforms is None:
+            random = numpy.random.RandomState(0)
+            uniforms = lambda turn: random.random_sample((self.count, 2))
+        for turn in range(max_turns):
+            if self.done.all(): break
+            self.step(uniforms(turn))
+
+    def is_win(self):
+        return ~(self.hp[:, self.players:] > 0).any(1)
+
+    def summarize(self):
+        return {
+            'battles': self.count,
+            'wins': int(self.is_win().sum()),
+            'win_rate': float(self.is_win().mean()) if self.count else 0.0,
+            'turns_mean': float(self.turns.mean()) if self.count else 0.0,
+            'turns_min': int(self.turns.min()) if self.count else 0,
+            'turns_max': int(self.turns.max()) if self.count else 0,
+            'unfinished': int((~self.done).sum()),
+        }
+
+def kth(mask, k):
+    "column of the k-th true value in each row of mask, 0 where there is none"
+    return numpy.argmax((numpy.cumsum(mask, 1) == (k + 1)[:, None]) & mask, 1)
+
+
+class ReplayRandom(object):
+    "random.Random stand-in returning given numbers, so rng.choice picks what the kernel picks"
+
+    def __init__(self, numbers):
+        self.numbers = iter(numbers)
+
+    def random(self):
+        return self.numbers.next()
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+def check(count, player_jobs, enemy_jobs, first_team = TEAM_PLAYER, seed = 0, max_turns = rpg.simulate.MAX_TURNS):
+    "run count battles in the kernel and the object model on the same numbers. returns differing battle indices"
+    numbers = numpy.random.RandomState(seed).random_sample((max_turns, count, 2))
+    battles = Battles(count, player_jobs, enemy_jobs, first_team)
+    battles.run(max_turns, lambda turn: numbers[turn])
+
+    mismatches = []
+    for i in range(count):
+        players = rpg.simulate.create_players(player_jobs)
+        rpg.model.set_players(players)
+        enemies = [rpg.character.Enemy(index, rpg.job.get_job(job), SEX_MALE) for index, job in enumerate(enemy_jobs)]
+        stage = rpg.stage.Stage(enemies, first_team)
+        won, turns, ended = rpg.simulate.run_battle(
+            stage, players,
+            rpg.simulate.random_policy, rpg.simulate.random_policy,
+            ReplayRandom(numbers[:, i, :].ravel()), max_turns
+        )
+        hps = [character.get_hp() for character in stage.get_characters()]
+        eps = [stage.get_ep(TEAM_PLAYER), stage.get_ep(TEAM_ENEMY)]
+        if (turns != battles.turns[i] or ended != battles.done[i]
+                or hps != list(battles.hp[i]) or eps != list(battles.ep[i])):
+            mismatches.append(i)
+    return mismatches
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m rpg.kernel', description = 'run battles as numpy arrays')
+    parser.add_argument('-n', '--battles', type = int, default = 100000)
+    parser.add_argument('--players', default = 'villager,villager,villager', help = 'comma separated player jobs')
+    parser.add_argument('--enemies', default = 'cat', help = 'comma separated enemy jobs')
+    parser.add_argument('--enemy-first', action = 'store_true')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('--check', type = int, metavar = 'N', help = 'compare N battles with the object model instead')
+    args = parser.parse_args(argv)
+
+    player_jobs = args.players.split(',')
+    enemy_jobs = args.enemies.split(',')
+    first_team = TEAM_ENEMY if args.enemy_first else TEAM_PLAYER
+
+    if args.check:
+        mismatches = check(args.check, player_jobs, enemy_jobs, first_team, args.seed)
+        print '%d of %d battles differ from the object model %s' % (len(mismatches), args.check, mismatches[:10])
+        return
+
+    start = time.time()
+    battles = Battles(args.battles, player_jobs, enemy_jobs, first_team)
+    random = numpy.random.RandomState(args.seed)
+    battles.run(uniforms = lambda turn: random.random_sample((args.battles, 2)))
+    elapsed = time.time() - start
+
+    summary = battles.summarize()
+    for key in ['battles', 'wins', 'win_rate', 'turns_mean', 'turns_min', 'turns_max', 'unfinished']:
+        print '%-12s %s' % (key, summary[key])
+    print '%-12s %.0f' % ('battles/s', args.battles / elapsed)
+
+if __name__ == '__main__':
+    main()
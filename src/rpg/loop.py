@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+
+"rpg.loop - main loops. lockstep updates and renders once a frame, fixed steps logic by CLOCK_STEP"
+
+import pygame
+from pygame.locals import *
+from rpg.constants import *
+import rpg.clock
+import rpg.event
+import rpg.scene
+
+def lockstep(fps = FPS, max_frames = 0):
+    clock = pygame.time.Clock()
+    frames = 0
+    while not max_frames or frames < max_frames:
+        clock.tick(fps)
+        rpg.clock.tick()
+        try:
+            rpg.event.poll()
+            rpg.scene.do()
+        except rpg.scene.SceneSwitchException, e:
+            rpg.scene.set_scene(e.scene)
+        frames += 1
+    return frames
+
+
+class FixedStepLoop(object):
+    "logic runs in steps of CLOCK_STEP game ms whatever the frame rate. renders are skipped when behind"
+
+    def __init__(self, fps = FPS, step = CLOCK_STEP, max_steps = LOOP_MAX_STEPS, max_skipped = LOOP_MAX_SKIPPED_RENDERS):
+        self.fps = fps
+        self.step = step
+        self.max_steps = max_steps
+        self.max_skipped = max_skipped
+        self.lag = 0.0
+        self.skipped = 0
+        self.stats = {
+            'frames': 0, 'steps': 0, 'renders': 0,
+            'skipped_renders': 0, 'slow_frames': 0, 'dropped_ms': 0.0,
+        }
+
+    def run(self, max_frames = 0):
+        rpg.clock.set_mode(rpg.clock.MODE_FIXED, self.step)
+        clock = pygame.time.Clock()
+        while not max_frames or self.stats['frames'] < max_frames:
+            self.lag += clock.tick(self.fps)
+            self.frame()
+        return self.stats['frames']
+
+    def frame(self):
+        self.stats['frames'] += 1
+
+        steps = 0
+        while self.lag >= self.step and steps < self.max_steps:
+            self.lag -= self.step
+            steps += 1
+            self.update()
+        if self.lag >= self.step:
+            # too far behind, let the game slow down instead of spiraling
+            self.stats['dropped_ms'] += self.lag - self.lag % self.step
+            self.lag %= self.step
+        self.stats['steps'] += steps
+
+        if steps == 0:
+            return
+        if steps > 1:
+            self.stats['slow_frames'] += 1
+            if self.skipped < self.max_skipped:
+                self.skipped += 1
+                self.stats['skipped_renders'] += 1
+                return
+        self.skipped = 0
+        self.render()
+
+    def update(self):
+        rpg.clock.tick()
+        try:
+            rpg.event.poll()
+            rpg.scene.update()
+        except rpg.scene.SceneSwitchException, e:
+            rpg.scene.set_scene(e.scene)
+
+    def render(self):
+        self.stats['renders'] += 1
+        rpg.scene.render()
+
+    def get_stats(self):
+        return dict(self.stats)
+
+
+current = None
+
+def fixed_step(fps = FPS, max_frames = 0):
+    global current
+    current = FixedStepLoop(fps)
+    return current.run(max_frames)
+
+def get_stats():
+    return current.get_stats() if current else {}
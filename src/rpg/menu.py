@@ -4,6 +4,7 @@ import pygame
 from pygame.locals import *
 from rpg.constants import *
 import rpg.scene
+import rpg.input
 import rpg.character
 import rpg.sprite
 import rpg.game
@@ -73,7 +74,7 @@ class MenuScene(rpg.scene.Scene):
 
     def update(self):
         rpg.scene.Scene.update(self)
-        if rpg.event.is_key_down(*ESCAPE_KEYS):
+        if rpg.input.is_down(ACTION_ESCAPE):
             rpg.scene.switch_scene(rpg.game.GameScene)
 
     def on_mouse_click(self, event):
@@ -135,17 +136,17 @@ class MenuController(rpg.scene.Controller):
 
     def update(self):
         radio = self.scene.menu_view.radio
-        if rpg.event.is_key_down(K_LEFT, *CANCEL_KEYS):
+        if rpg.input.is_down(ACTION_LEFT | ACTION_CANCEL):
             rpg.scene.switch_scene(rpg.game.GameScene)
-        elif rpg.event.is_key_down(K_RIGHT, *OK_KEYS):
+        elif rpg.input.is_down(ACTION_RIGHT | ACTION_OK):
             button = radio.focused_or_selected_button()
             radio.select(button)
             self.scene.set_controller_for(button.item)
-        elif rpg.event.is_key_down(K_UP):
+        elif rpg.input.is_down(ACTION_UP):
             radio.unfocus()
             radio.select(radio.prev_button(radio.focused_or_selected_button()))
             self.scene.cursor.point(radio.selected_button)
-        elif rpg.event.is_key_down(K_DOWN):
+        elif rpg.input.is_down(ACTION_DOWN):
             radio.unfocus()
             radio.select(radio.next_button(radio.focused_or_selected_button()))
             self.scene.cursor.point(radio.selected_button)
@@ -161,20 +162,20 @@ class JobController(rpg.scene.Controller):
 
     def update(self):
         table = self.scene.job_view.table
-        if rpg.event.is_key_down(*CANCEL_KEYS):
+        if rpg.input.is_down(ACTION_CANCEL):
             table.unfocus()
             self.scene.set_controller_for('menu')
-        elif rpg.event.is_key_down(*OK_KEYS):
+        elif rpg.input.is_down(ACTION_OK):
             if table.focused_or_selected_button().enabled:
                 table.select(table.focused_or_selected_button())
                 #self.scene.set_controller_for('menu')
-        elif rpg.event.is_key_down(K_UP):
+        elif rpg.input.is_down(ACTION_UP):
             table.focus(table.up_button(table.focused_or_selected_button()))
-        elif rpg.event.is_key_down(K_DOWN):
+        elif rpg.input.is_down(ACTION_DOWN):
             table.focus(table.down_button(table.focused_or_selected_button()))
-        elif rpg.event.is_key_down(K_LEFT):
+        elif rpg.input.is_down(ACTION_LEFT):
             table.focus(table.left_button(table.focused_or_selected_button()))
-        elif rpg.event.is_key_down(K_RIGHT):
+        elif rpg.input.is_down(ACTION_RIGHT):
             table.focus(table.right_button(table.focused_or_selected_button()))
 
 class SkillController(rpg.scene.Controller):
@@ -193,16 +194,16 @@ class SkillController(rpg.scene.Controller):
         self.scene.skill_view.update_info()
 
     def update(self):
-        if rpg.event.is_key_down(*CANCEL_KEYS):
+        if rpg.input.is_down(ACTION_CANCEL):
             self.target_table.unfocus()
             self.scene.set_controller_for('menu')
-        elif rpg.event.is_key_down(*OK_KEYS):
+        elif rpg.input.is_down(ACTION_OK):
             self.target_table.toggle(self.target_table.focused_button)
-        elif rpg.event.is_key_down(K_LEFT):
+        elif rpg.input.is_down(ACTION_LEFT):
             self.target_table.focus(self.target_table.left_button(self.target_table.focused_button))
-        elif rpg.event.is_key_down(K_RIGHT):
+        elif rpg.input.is_down(ACTION_RIGHT):
             self.target_table.focus(self.target_table.right_button(self.target_table.focused_button))
-        elif rpg.event.is_key_down(K_UP):
+        elif rpg.input.is_down(ACTION_UP):
             next_button = self.target_table.up_button(self.target_table.focused_button, loop = False)
             if self.target_table == self.scene.skill_view.skill_table and next_button == self.target_table.focused_button:
                 self.target_table.unfocus()
@@ -210,7 +211,7 @@ class SkillController(rpg.scene.Controller):
                 self.target_table.focus(self.target_table.buttons()[0])
             else:
                 self.target_table.focus(next_button)
-        elif rpg.event.is_key_down(K_DOWN):
+        elif rpg.input.is_down(ACTION_DOWN):
             next_button = self.target_table.down_button(self.target_table.focused_button, loop = False)
             if self.target_table == self.scene.skill_view.job_table and next_button == self.target_table.focused_button:
                 if len(self.scene.skill_view.skill_table.buttons()):
@@ -277,16 +278,17 @@ class JobView(rpg.sprite.CompositeGroup):
         rect.midbottom = (40, 80)
         self.info.image.blit(job_image, rect)
 
-        self.info.image.blit(rpg.resource.font().render(u'HP %3d' % job.max_hp, False, (0, 0, 0)), (10, 90))
-        self.info.image.blit(rpg.resource.font().render(u'Lv  %2d' % self.player.get_level(job), False, (0, 0, 0)), (10, 105))
+        self.info.image.blit(rpg.resource.text(u'HP %3d' % job.max_hp, (0, 0, 0)), (10, 90))
+        self.info.image.blit(rpg.resource.text(u'Lv  %2d' % self.player.get_level(job), (0, 0, 0)), (10, 105))
         if not self.player.is_master(job):
-            self.info.image.blit(rpg.resource.font().render(u'Exp %2d / %d' % (self.player.get_current_exp(job), job.exp_for_level(self.player.get_level(job))), False, (0, 0, 0)), (10, 120))
+            self.info.image.blit(rpg.resource.text(u'Exp %2d / %d' % (self.player.get_current_exp(job), job.exp_for_level(self.player.get_level(job))), (0, 0, 0)), (10, 120))
 
         for i, trait in enumerate(job.get_traits()):
-            self.info.image.blit(rpg.resource.font().render(trait.description, False, (0, 0, 0)), (100, 20 + i * 15))
+            self.info.image.blit(rpg.resource.text(trait.description, (0, 0, 0)), (100, 20 + i * 15))
 
         for i, line in enumerate(job.description.split('\n')):
-            self.info.image.blit(rpg.resource.font().render(line, False, (0, 0, 0)), (100, 90 + i * 15))
+            self.info.image.blit(rpg.resource.text(line, (0, 0, 0)), (100, 90 + i * 15))
+        self.info.set_dirty()
 
 
         for button in self.table.buttons():
@@ -305,34 +307,32 @@ class JobTableRadioButton(rpg.ui.RadioButton):
             self.required = b
             self.draw_image()
 
-    def draw_image(self):
-        self.image.fill((255, 255, 255))
- 
-        if self.selected or self.focused:
-            border_color = (0, 0, 0) if self.selected else COLOR_DISABLED
-            rpg.draw.rounded_rect(
-                self.image, self.image.get_rect().inflate(-2, -2),
-                border_color = border_color
-            )
- 
-        label_color = (0, 0, 0) if self.enabled else COLOR_DISABLED
-        label_image = rpg.resource.font().render(self.label, False, label_color)
-        self.image.blit(label_image, (5, (self.rect.height - label_image.get_rect().height) / 2))
- 
-        modify_label = self.get_modifier_label()
+    def get_state(self):
+        return super(JobTableRadioButton, self).get_state() + (self.required, )
+
+    def get_states(self):
+        states = super(JobTableRadioButton, self).get_states()
+        return [state + (required, ) for state in states for required in (False, True)]
+
+    def render_state(self, image, state):
+        label_image = super(JobTableRadioButton, self).render_state(image, state)
+
+        modify_label = self.get_modifier_label(state[2])
         if modify_label:
             modify_color = COLOR_DISABLED if self.learn_state == LEARN_STATE_NONE else (0, 0, 0)
-            self.image.blit(
-                rpg.resource.font().render(modify_label, False, modify_color),
+            image.blit(
+                rpg.resource.text(modify_label, modify_color),
                 (5 + label_image.get_width(), (self.rect.height - label_image.get_rect().height) / 2)
             )
+        return label_image
 
-    def get_modifier_label(self):
+    def get_modifier_label(self, required = None):
+        if required is None: required = self.required
         if self.learn_state == LEARN_STATE_MASTER:
-            return u'★' if self.required else u'☆'
+            return u'★' if required else u'☆'
         elif self.learn_state == LEARN_STATE_FAMILIAR:
-            return u'●' if self.required else u'○'
-        elif self.required:
+            return u'●' if required else u'○'
+        elif required:
             return u'●'
         return ''            
 
@@ -350,7 +350,7 @@ class SkillView(rpg.sprite.CompositeGroup):
         job_label = rpg.sprite.Sprite(pygame.Surface((200, 15)))
         job_label.rect.topleft = (100, 45)
         job_label.image.fill((255, 255, 255))
-        job_label.image.blit(rpg.resource.font().render(u'クラススキル', False, (0, 0, 0)), (0, 0))
+        job_label.image.blit(rpg.resource.text(u'クラススキル', (0, 0, 0)), (0, 0))
         self.add(job_label)
 
         self.job_table = rpg.ui.ToggleTable(cols = 4)
@@ -361,7 +361,7 @@ class SkillView(rpg.sprite.CompositeGroup):
         skill_label = rpg.sprite.Sprite(pygame.Surface((60, 15)))
         skill_label.rect.topleft = (100, 100)
         skill_label.image.fill((255, 255, 255))
-        skill_label.image.blit(rpg.resource.font().render(u'習得スキル', False, (0, 0, 0)), (0, 0))
+        skill_label.image.blit(rpg.resource.text(u'習得スキル', (0, 0, 0)), (0, 0))
         self.add(skill_label)
 
         self.remain_label = rpg.sprite.Sprite(pygame.Surface((100, 15)))
@@ -388,12 +388,13 @@ class SkillView(rpg.sprite.CompositeGroup):
 
     def update_info(self):
         self.info.image.fill((255, 255, 255))
+        self.info.set_dirty()
 
         focused = self.job_table.focused_button or self.skill_table.focused_button
         if not focused: return
 
         skill = focused.item
-        self.info.image.blit(rpg.resource.font().render(skill.description, False, (0, 0, 0)), (0, 0))
+        self.info.image.blit(rpg.resource.text(skill.description, (0, 0, 0)), (0, 0))
         
 
     def update_tables(self):
@@ -410,7 +411,8 @@ class SkillView(rpg.sprite.CompositeGroup):
     def update_remain_label(self):
         self.remain_label.image.fill(Color('white'))
         label = "%d / %d" % (len(self.player.get_active_learned_skills()), self.player.get_skill_limit())
-        self.remain_label.image.blit(rpg.resource.font().render(label, False, Color('black')), (0, 0))
+        self.remain_label.image.blit(rpg.resource.text(label, Color('black')), (0, 0))
+        self.remain_label.set_dirty()
 
 class SkillSkillToggleTable(rpg.ui.ToggleTable):
     def __init__(self, *args, **kwargs):
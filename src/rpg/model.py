@@ -21,6 +21,9 @@ def init():
 def get_players():
     return _players
 
+def set_players(players):
+    rpg.model._players = players
+
 def get_player(index):
     return _players[index]
 
@@ -33,5 +36,8 @@ def prev_player(next_player):
 def get_stage():
     return _stage
 
+def set_stage(stage):
+    rpg.model._stage = stage
+
 def next_stage():
     rpg.model._stage  = rpg.stage.Stage1_1()
@@ -0,0 +1,113 @@
+# -*- coding:utf-8 -*-
+
+"rpg.preload - decode resource images on worker threads, finish them on the main thread"
+
+import threading
+import Queue
+import pygame
+from pygame.locals import *
+from rpg.constants import *
+import rpg.resource
+import rpg.sheet
+import rpg.text
+
+GLYPH_CHUNK = 16
+
+class Preloader(object):
+    def __init__(self, names = None, chars = None, threads = PRELOAD_THREADS):
+        if names is None:
+            names = sorted([name for name in rpg.resource.get_resource_names() if name.endswith('.png')])
+        if chars is None:
+            chars = sorted(rpg.text.game_characters())
+
+        self.names = names
+        self.threads = threads
+        self.pending = Queue.Queue()
+        self.decoded = Queue.Queue()
+        for name in names:
+            self.pending.put(name)
+
+        # SDL_ttf is not thread safe, glyphs are rasterized on the main thread a chunk at a time
+        self.glyphs = [(small, chars[i:i + GLYPH_CHUNK]) for small in (False, True) for i in range(0, len(chars), GLYPH_CHUNK)]
+        self.total = len(names) + len(self.glyphs) + 1
+        self.loaded = 0
+        self.sheets_loaded = False
+        self.workers = []
+
+    def start(self):
+        for i in range(min(self.threads, len(self.names))):
+            worker = threading.Thread(target = self.work, name = 'preload-%d' % i)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def work(self):
+        while True:
+            try:
+                name = self.pending.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                self.decoded.put((name, pygame.image.load(rpg.resource.get_resouce_path(name)), None))
+            except Exception, e:
+                self.decoded.put((name, None, e))
+
+    def poll(self, budget = PRELOAD_FRAME_BUDGET):
+        "finish preloaded assets for up to budget ms. None blocks until everything is done"
+        start = pygame.time.get_ticks()
+        while not self.is_done():
+            if budget is not None and pygame.time.get_ticks() - start >= budget:
+                return
+            if self.loaded < len(self.names):
+                try:
+                    name, surface, error = self.decoded.get(budget is None)
+                except Queue.Empty:
+                    # nothing decoded yet, spend the time on glyphs
+                    if not self.step_glyphs(): return
+                    continue
+                if error:
+                    raise pygame.error('%s: %s' % (name, error))
+                if name not in rpg.resource.images:
+                    rpg.resource.images.put(name, surface.convert_alpha())
+                self.loaded += 1
+            elif not self.step_glyphs():
+                rpg.sheet.preload()
+                self.sheets_loaded = True
+
+    def step_glyphs(self):
+        if not self.glyphs: return False
+        small, chars = self.glyphs.pop(0)
+        rpg.text.get_atlas(small).add(chars)
+        return True
+
+    def wait(self):
+        self.poll(None)
+
+    def is_done(self):
+        return self.sheets_loaded
+
+    def get_progress(self):
+        finished = self.total - (len(self.names) - self.loaded) - len(self.glyphs) - (not self.sheets_loaded)
+        return float(finished) / self.total
+
+
+preloader = None
+
+def start(names = None, chars = None):
+    "start decoding in the background. call after the display is set"
+    global preloader
+    preloader = Preloader(names, chars)
+    preloader.start()
+    return preloader
+
+def poll(budget = PRELOAD_FRAME_BUDGET):
+    if preloader: preloader.poll(budget)
+
+def wait():
+    if preloader: preloader.wait()
+
+def is_done():
+    return not preloader or preloader.is_done()
+
+def get_progress():
+    return preloader.get_progress() if preloader else 1.0
@@ -0,0 +1,115 @@
+# -*- coding:utf-8 -*-
+
+"""rpg.record - record what poll() receives and feed it back frame by frame
+
+A recording keeps the game time, the mouse position and the events of every
+poll as a gzipped pickle. Replaying sets the clock to the recorded time before
+each poll, so scenes, waits and animations see the same frames again whatever
+the frame rate. The search enemy ai is bounded by wall time and may still differ.
+"""
+
+import gzip
+import array
+import cPickle as pickle
+import pygame
+from pygame.locals import *
+from rpg.constants import *
+import rpg.clock
+
+FORMAT_VERSION = 1
+
+class Recorder(object):
+    "frames are polls. events are kept as (type, attrs) so they pickle"
+
+    def __init__(self, path):
+        self.path = path
+        self.ticks = array.array('d')
+        self.mouse = {}  # frame: position, only when it changed
+        self.events = {}  # frame: [(type, attrs)], only when there are some
+        self.last_mouse = None
+
+    def record(self, events, mouse_pos):
+        frame = len(self.ticks)
+        self.ticks.append(rpg.clock.get_ticks())
+        if mouse_pos != self.last_mouse:
+            self.mouse[frame] = mouse_pos
+            self.last_mouse = mouse_pos
+        # quitting ends the recording, it is not replayed
+        events = [(event.type, dict(event.dict)) for event in events if event.type != QUIT]
+        if events:
+            self.events[frame] = events
+
+    def get_frames(self):
+        return len(self.ticks)
+
+    def save(self):
+        f = gzip.open(self.path, 'wb')
+        try:
+            pickle.dump({
+                'version': FORMAT_VERSION,
+                'ticks': self.ticks,
+                'mouse': self.mouse,
+                'events': self.events,
+            }, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+
+
+class Replayer(object):
+    "drives the clock and the event stream of a recording. call next() in place of pygame.event.get()"
+
+    def __init__(self, path):
+        f = gzip.open(path, 'rb')
+        try:
+            data = pickle.load(f)
+        finally:
+            f.close()
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError('unsupported recording version %s in %s' % (data.get('version'), path))
+        self.ticks = data['ticks']
+        self.mouse = data['mouse']
+        self.events = data['events']
+        self.frame = 0
+        self.mouse_pos = (0, 0)
+
+    def next(self, live_events = ()):
+        "(events, mouse position) of the next frame. live events are dropped except QUIT"
+        frame = self.frame
+        self.frame += 1
+        if frame < len(self.ticks):
+            rpg.clock.set_ticks(self.ticks[frame])
+        self.mouse_pos = self.mouse.get(frame, self.mouse_pos)
+        events = [pygame.event.Event(type, attrs) for type, attrs in self.events.get(frame, ())]
+        events.extend([event for event in live_events if event.type == QUIT])
+        return events, self.mouse_pos
+
+    def get_frames(self):
+        return len(self.ticks)
+
+    def is_done(self):
+        return self.frame >= len(self.ticks)
+
+
+recorder = None
+replayer = None
+
+def start_recording(path):
+    global recorder
+    recorder = Recorder(path)
+    return recorder
+
+def start_replay(path):
+    "the clock only moves to recorded times from now on"
+    global replayer
+    replayer = Replayer(path)
+    rpg.clock.set_mode(rpg.clock.MODE_MANUAL)
+    rpg.clock.reset()
+    return replayer
+
+def stop():
+    "save the recording, if any"
+    global recorder, replayer
+    if recorder:
+        recorder.save()
+    recorder = None
+    replayer = None
@@ -1,14 +1,146 @@
 # -*- coding:utf-8 -*-
 
 import os
+import collections
+import weakref
 import pygame
 from pygame.locals import *
 from rpg.constants import *
+import rpg.text
 
-images = {}
 
-def image(name):
-    return images.setdefault(name, pygame.image.load(get_resouce_path(name)).convert_alpha())
+class SurfaceCache(object):
+    "LRU cache of surfaces, bounded by the total bytes of unpinned entries"
+
+    def __init__(self, budget = IMAGE_CACHE_BUDGET):
+        self.budget = budget
+        self.surfaces = collections.OrderedDict()
+        self.sizes = {}
+        self.pinned = set()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        if key in self.surfaces:
+            self.hits += 1
+            # move to the most recently used end
+            surface = self.surfaces.pop(key)
+            self.surfaces[key] = surface
+            return surface
+
+        self.misses += 1
+        surface = loader(key)
+        self.put(key, surface)
+        return surface
+
+    def put(self, key, surface):
+        self.discard(key)
+        self.surfaces[key] = surface
+        self.sizes[key] = surface_bytes(surface)
+        self.bytes += self.sizes[key]
+        self.evict()
+
+    def discard(self, key):
+        if key not in self.surfaces: return
+        del self.surfaces[key]
+        self.bytes -= self.sizes.pop(key)
+
+    def evict(self):
+        for key in list(self.surfaces):
+            if self.bytes <= self.budget: break
+            if key in self.pinned: continue
+            self.discard(key)
+            self.evictions += 1
+
+    def pin(self, key):
+        self.pinned.add(key)
+
+    def unpin(self, key):
+        self.pinned.discard(key)
+        self.evict()
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.evict()
+
+    def clear(self):
+        for key in list(self.surfaces):
+            self.discard(key)
+
+    def __contains__(self, key):
+        return key in self.surfaces
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+            'evictions': self.evictions,
+            'count': len(self.surfaces),
+            'bytes': self.bytes,
+            'budget': self.budget,
+            'pinned': len(self.pinned),
+        }
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+images = SurfaceCache()
+
+def image(name, flip = False):
+    surface = images.get(name, load_image)
+    return flipped(surface) if flip else surface
+
+def load_image(name):
+    return pygame.image.load(get_resouce_path(name)).convert_alpha()
+
+def pin_image(*names):
+    "pinned images are never evicted. pinning does not load the image"
+    for name in names:
+        images.pin(name)
+
+def unpin_image(*names):
+    for name in names:
+        images.unpin(name)
+
+def set_image_budget(budget):
+    images.set_budget(budget)
+
+def get_image_stats():
+    return images.stats()
+
+
+# mirrored surfaces live as long as their source surface
+mirrors = weakref.WeakKeyDictionary()
+mirror_sources = weakref.WeakKeyDictionary()
+flip_stats = { 'hits': 0, 'created': 0 }
+
+def flipped(surface):
+    "horizontally mirrored surface. shared, dont modify it"
+    source = mirror_sources.get(surface)
+    if source is not None and source() is not None:
+        flip_stats['hits'] += 1
+        return source()
+
+    mirror = mirrors.get(surface)
+    if mirror is not None:
+        flip_stats['hits'] += 1
+        return mirror
+
+    mirror = pygame.transform.flip(surface, True, False)
+    mirrors[surface] = mirror
+    mirror_sources[mirror] = weakref.ref(surface)
+    flip_stats['created'] += 1
+    return mirror
+
+def get_flip_stats():
+    stats = dict(flip_stats)
+    stats['count'] = len(mirrors)
+    return stats
+
 
 fonts = {}
 def font(small = False):
@@ -18,13 +150,54 @@ def font(small = False):
     return fonts[size]
 
 
+texts = SurfaceCache(TEXT_CACHE_BUDGET)
+
+def text(string, color = COLOR_FOREGROUND, small = False, antialias = False):
+    "rendered text. shared, dont modify it"
+    return texts.get((small, string, antialias, color_key(color)), render_text)
+
+def render_text((small, string, antialias, color)):
+    if antialias:
+        return font(small).render(string, antialias, color)
+    return rpg.text.render(string, color, small)
+
+def color_key(color):
+    if isinstance(color, Color): return tuple(color)
+    return tuple(color) + (255, ) * (4 - len(color))
+
+def get_text_stats():
+    return texts.stats()
+
+
 def get_resouce_path(name):
     return os.path.join(RESOURCE_DIR, name)
 
 
-def job_image(job, sex = SEX_NONE):
-    if sex == SEX_FEMALE:
-        name = job.name + '_female.png'
-        if os.path.exists(get_resouce_path(name)):
-            return image(name)
-    return image(job.name + '.png')
+# names of files in RESOURCE_DIR, listed once. call rescan after adding files
+resource_names = None
+job_image_names = {}
+
+def rescan():
+    global resource_names
+    resource_names = frozenset(os.listdir(RESOURCE_DIR))
+    job_image_names.clear()
+
+def get_resource_names():
+    if resource_names is None: rescan()
+    return resource_names
+
+def has_resource(name):
+    return name in get_resource_names()
+
+
+def job_image(job, sex = SEX_NONE, flip = False):
+    return image(job_image_name(job, sex), flip)
+
+def job_image_name(job, sex = SEX_NONE):
+    key = (job.name, sex)
+    if key not in job_image_names:
+        name = job.name + '.png'
+        if sex == SEX_FEMALE and has_resource(job.name + '_female.png'):
+            name = job.name + '_female.png'
+        job_image_names[key] = name
+    return job_image_names[key]
@@ -2,6 +2,8 @@
 
 import pygame
 from pygame.locals import *
+from rpg.constants import *
+import rpg.clock
 import rpg.sprite
 import rpg.event
 import rpg.model
@@ -40,6 +42,8 @@ class EventListenable(object):
 
 
 class Scene(EventListenable, rpg.lang.Singleton):
+    dirty_rendering = DIRTY_RENDERING
+
     def __init__(self):
         super(Scene, self).__init__()
         screen = pygame.display.get_surface()
@@ -47,7 +51,7 @@ class Scene(EventListenable, rpg.lang.Singleton):
         self.background.fill((255, 255, 255))
 
         self.views = {}
-        self.group = rpg.sprite.SceneGroup(self)
+        self.group = rpg.sprite.SceneGroup(self, self.dirty_rendering)
         self.controller = None
 
         self.cursor = rpg.ui.CursorSprite()
@@ -171,8 +175,8 @@ class CoroutineController(Controller):
         yield
 
     def wait_generator(self, ms):
-        limit = pygame.time.get_ticks() + ms
-        while limit > pygame.time.get_ticks():
+        limit = rpg.clock.get_ticks() + ms
+        while limit > rpg.clock.get_ticks():
             yield
 
 
@@ -195,3 +199,12 @@ def do():
     _current_scene.update()
     _current_scene.render(screen)
 
+def update():
+    "logic step of the current scene without drawing"
+    _current_scene.update()
+
+def render():
+    screen = pygame.display.get_surface()
+    _current_scene.clear(screen)
+    _current_scene.render(screen)
+
@@ -0,0 +1,99 @@
+# -*- coding:utf-8 -*-
+
+"rpg.sheet - frame geometry and timing of animation sheets from sheets.yml"
+
+import pygame
+from pygame.locals import *
+import rpg.resource
+import rpg.sprite
+import yaml
+
+ANCHORS = [
+    'topleft', 'midtop', 'topright',
+    'midleft', 'center', 'midright',
+    'bottomleft', 'midbottom', 'bottomright',
+]
+
+class Sheet(object):
+    def __init__(self, name, num_frame, rects = None, durations = None, loop = True, anchor = 'topleft'):
+        self.name = name
+        self.num_frame = num_frame
+        self.rects = tuple([tuple(rect) for rect in rects]) if rects else None
+        self.durations = tuple(durations) if durations else frame_durations(6, num_frame)
+        self.loop = loop
+        self.anchor = anchor
+
+    def get_rects(self):
+        "frame rects in the sheet image. strips are split by the image width"
+        if self.rects:
+            return self.rects
+        width, height = rpg.resource.image(self.name).get_size()
+        width /= self.num_frame
+        return tuple([(width * i, 0, width, height) for i in range(self.num_frame)])
+
+    def get_duration(self):
+        return sum(self.durations)
+
+def frame_durations(fps, num_frame):
+    return (1000.0 / fps,) * num_frame
+
+
+_sheets_for_name = {}
+
+def load_sheets():
+    global _sheets_for_name
+
+    infos = yaml.load(open(rpg.resource.get_resouce_path('sheets.yml')))
+    _sheets_for_name = dict([(info['name'], create_sheet(info)) for info in infos])
+
+def create_sheet(info):
+    rects = info.get('rects')
+    num_frame = len(rects) if rects else info['frames']
+    durations = info.get('durations') or frame_durations(info.get('fps', 6), num_frame)
+    if len(durations) != num_frame:
+        raise ValueError('%s: %d durations for %d frames' % (info['name'], len(durations), num_frame))
+    if info.get('anchor', 'topleft') not in ANCHORS:
+        raise ValueError('%s: unknown anchor %s' % (info['name'], info['anchor']))
+
+    return Sheet(
+        info['name'], num_frame, rects, durations,
+        info.get('loop', True),
+        info.get('anchor', 'topleft')
+    )
+
+load_sheets()
+
+
+def get_sheets():
+    return _sheets_for_name.values()
+def get_sheet(name):
+    return _sheets_for_name[name]
+def has_sheet(name):
+    return name in _sheets_for_name
+
+def strip(name, num_frame, fps = 6, loop = True):
+    "sheet for an image not in the manifest"
+    return Sheet(name, num_frame, None, frame_durations(fps, num_frame), loop)
+
+def validate():
+    "problems found in the manifest against the images, empty when it is fine"
+    errors = []
+    for sheet in get_sheets():
+        if not rpg.resource.has_resource(sheet.name):
+            errors.append('%s: image not found' % sheet.name)
+            continue
+        bounds = rpg.resource.image(sheet.name).get_rect()
+        for i, rect in enumerate(sheet.get_rects()):
+            if Rect(rect).width <= 0 or Rect(rect).height <= 0 or not bounds.contains(rect):
+                errors.append('%s: frame %d %s out of %s' % (sheet.name, i, rect, bounds.size))
+        if min(sheet.durations) <= 0:
+            errors.append('%s: frame durations must be positive' % sheet.name)
+    return errors
+
+def preload():
+    "decode and cut every sheet in the manifest. call after the display is set"
+    errors = validate()
+    if errors:
+        raise ValueError('\n'.join(errors))
+    for sheet in get_sheets():
+        rpg.sprite.get_frames(sheet)
@@ -0,0 +1,169 @@
+# -*- coding:utf-8 -*-
+
+"""rpg.simulate - run battles on the model only, without scenes, views or waits
+
+usage: python -m rpg.simulate [-n BATTLES] [--jobs villager,cat,witch] [--stage Stage1_1]
+"""
+
+import time
+import random
+import argparse
+import multiprocessing
+from rpg.constants import *
+import rpg.ai
+import rpg.model
+import rpg.character
+import rpg.job
+import rpg.stage
+import rpg.skill
+
+MAX_TURNS = 200
+PLAYER_NAMES = [('boy', SEX_MALE), ('girl', SEX_FEMALE), ('ninja', SEX_MALE)]
+
+
+# policies choose the command of the actor, with its targets set
+
+def available_commands(actor):
+    "commands the actor can afford. passing when there is none"
+    commands = [command for command in actor.get_commands() if command.can_do()]
+    if not commands:
+        command = rpg.skill.DefaultCommand()
+        command.set_name('pass')
+        command.set_label('pass')
+        command.set_actor(actor)
+        commands.append(command)
+    return commands
+
+def target_choices(stage, command):
+    "target lists a player could select for command, rivals first"
+    if command.get_target_type() == TARGET_ONE:
+        return [[character] for character in stage.get_rivals(command.actor) if character.is_alive()]
+    if command.get_target_type() == TARGET_TEAM:
+        return [[character for character in stage.get_rivals(command.actor) if character.is_alive()]]
+    return [[]]
+
+def random_policy(stage, rng):
+    command = rng.choice(available_commands(stage.get_actor()))
+    command.set_targets(rng.choice(target_choices(stage, command)))
+    return command
+
+def greedy_policy(stage, rng):
+    "most damage to rivals this turn, ties broken at random"
+    best = []
+    best_damage = -1
+    for command in available_commands(stage.get_actor()):
+        for targets in target_choices(stage, command):
+            command.set_targets(targets)
+            damage = sum([min(value, target.get_hp()) for target, value in command.get_damages().iteritems()])
+            if damage > best_damage:
+                best, best_damage = [], damage
+            if damage == best_damage:
+                best.append((command, targets))
+    command, targets = rng.choice(best)
+    command.set_targets(targets)
+    return command
+
+def stage_policy(stage, rng):
+    "what the stage does for its enemies in the game"
+    return stage.create_command()
+
+search_ai = rpg.ai.SearchAI()
+
+def search_policy(stage, rng):
+    return search_ai.create_command(stage)
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'stage': stage_policy,
+    'search': search_policy,
+}
+
+
+def create_players(jobs):
+    return [
+        rpg.character.Player(index, name, rpg.job.get_job(job), sex)
+        for index, (job, (name, sex)) in enumerate(zip(jobs, PLAYER_NAMES))
+    ]
+
+def run_battle(stage, players, player_policy, enemy_policy, rng, max_turns = MAX_TURNS):
+    "play one battle to the end like the game controllers do. returns (won, turns, ended)"
+    rpg.model.set_players(players)
+    rpg.model.set_stage(stage)
+    stage.init()
+
+    turns = 0
+    while not stage.is_end() and turns < max_turns:
+        stage.initialize_turn()
+        policy = player_policy if stage.get_actor().is_player() else enemy_policy
+        policy(stage, rng).do()
+        stage.finalize_turn()
+        turns += 1
+    return (stage.is_win(), turns, stage.is_end())
+
+def run_battles((seed, count, jobs, stage_name, player_policy, enemy_policy)):
+    results = []
+    for i in range(seed, seed + count):
+        rng = random.Random(i)
+        players = create_players(jobs)
+        rpg.model.set_players(players)
+        stage = getattr(rpg.stage, stage_name)()
+        results.append(run_battle(stage, players, POLICIES[player_policy], POLICIES[enemy_policy], rng))
+    return results
+
+def simulate(battles, jobs, stage_name = 'Stage1_1', player_policy = 'random', enemy_policy = 'stage', seed = 0, processes = None, chunk = 1000):
+    "battle seeds are seed .. seed + battles - 1 whatever the process count"
+    tasks = [
+        (start, min(chunk, seed + battles - start), jobs, stage_name, player_policy, enemy_policy)
+        for start in range(seed, seed + battles, chunk)
+    ]
+    if processes == 1:
+        chunks = map(run_battles, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunks = pool.map(run_battles, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    return [result for results in chunks for result in results]
+
+def summarize(results):
+    turns = [turn for won, turn, ended in results]
+    wins = len([won for won, turn, ended in results if won])
+    return {
+        'battles': len(results),
+        'wins': wins,
+        'win_rate': float(wins) / len(results) if results else 0.0,
+        'turns_mean': float(sum(turns)) / len(turns) if turns else 0.0,
+        'turns_min': min(turns) if turns else 0,
+        'turns_max': max(turns) if turns else 0,
+        'unfinished': len([ended for won, turn, ended in results if not ended]),
+    }
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m rpg.simulate', description = 'run model-only battles')
+    parser.add_argument('-n', '--battles', type = int, default = 10000)
+    parser.add_argument('--jobs', default = 'villager,villager,villager', help = 'comma separated player jobs')
+    parser.add_argument('--stage', default = 'Stage1_1', help = 'stage class in rpg.stage')
+    parser.add_argument('--players', default = 'random', choices = sorted(POLICIES), help = 'player policy')
+    parser.add_argument('--enemies', default = 'stage', choices = sorted(POLICIES), help = 'enemy policy')
+    parser.add_argument('--seed', type = int, default = 0)
+    parser.add_argument('-j', '--processes', type = int, default = None, help = 'pool size, default cpu count')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    results = simulate(
+        args.battles, args.jobs.split(','), args.stage,
+        args.players, args.enemies, args.seed, args.processes
+    )
+    elapsed = time.time() - start
+
+    summary = summarize(results)
+    for key in ['battles', 'wins', 'win_rate', 'turns_mean', 'turns_min', 'turns_max', 'unfinished']:
+        print '%-12s %s' % (key, summary[key])
+    print '%-12s %.0f' % ('battles/s', len(results) / elapsed)
+
+if __name__ == '__main__':
+    main()
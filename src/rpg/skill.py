@@ -23,9 +23,11 @@ class Skill(object):
         return command
 
 class Command(object):
-    def __init__(self, target_type, ep_cost = 0):
+    def __init__(self, target_type, ep_cost = 0, damage = 0, attr = 0):
         self.target_type = target_type
         self.ep_cost = ep_cost
+        self.damage = damage
+        self.attr = attr
 
     def get_target_type(self):
         return self.target_type
@@ -48,8 +50,13 @@ class Command(object):
     def get_stage(self):
         return rpg.model.get_stage()
 
+    def get_damage(self):
+        "base damage and attribute before modify_damage"
+        return (self.damage, self.attr)
+
     def get_damages(self):
-        return {}
+        if not self.damage: return {}
+        return dict([(target, modify_damage(self.damage, self.attr, self.actor, target)) for target in self.targets])
 
     def can_do(self):
         return self.get_ep_cost() <= self.get_stage().get_ep(self.actor.get_team())
@@ -66,10 +73,7 @@ class DefaultCommand(Command):
 
 class BeatCommand(Command):
     def __init__(self):
-        super(BeatCommand, self).__init__(TARGET_ONE)
-
-    def get_damages(self):
-        return dict([(target, modify_damage(3, DAMAGE_PHYSIC, self.actor, target)) for target in self.targets])
+        super(BeatCommand, self).__init__(TARGET_ONE, damage = 3, attr = DAMAGE_PHYSIC)
 
 class WatchCommand(Command):
     def __init__(self):
@@ -81,21 +85,25 @@ class DefenceCommand(Command):
 
 class FireCommand(Command):
     def __init__(self):
-        super(FireCommand, self).__init__(TARGET_TEAM, ep_cost = 3)
-
-    def get_damages(self):
-        return dict([(target, modify_damage(3, DAMAGE_MAGIC, self.actor, target)) for target in self.targets])
+        super(FireCommand, self).__init__(TARGET_TEAM, ep_cost = 3, damage = 3, attr = DAMAGE_MAGIC)
 
 
 
 def modify_damage(value, attr, actor, target):
+    return modify_damage_value(
+        value, attr, actor.has_trait, target.has_trait,
+        rpg.model.get_stage().get_ep(actor.get_team())
+    )
+
+def modify_damage_value(value, attr, actor_has_trait, target_has_trait, ep):
+    "modify_damage without characters, for snapshots of a battle"
     if attr & DAMAGE_PHYSIC:
-        if actor.has_trait('villager'):
-            value += math.floor(rpg.model.get_stage().get_ep(actor.get_team()) / 2)
-        if target.has_trait('nerd'):
+        if actor_has_trait('villager'):
+            value += math.floor(ep / 2)
+        if target_has_trait('nerd'):
             value += math.floor(value / 2)
     if attr & DAMAGE_MAGIC:
-        if actor.has_trait('magician'):
+        if actor_has_trait('magician'):
             value += math.floor(value / 2)
     return value
 
@@ -1,15 +1,19 @@
 # -*- coding:utf-8 -*-
 
-import math
 import pygame
 from pygame.locals import *
 from rpg.constants import *
+import rpg.clock
 import rpg.resource
+import rpg.sheet
 import rpg.event
 import rpg.lang
 
 def sprites_from_groups(groups):
-    return reduce(lambda sprites, group: sprites + group.sprites(), groups, [])
+    sprites = []
+    for group in groups:
+        sprites.extend(group.sprites())
+    return sprites
 
 def add_to_clickable(scene_group, *sprites):
     if not scene_group: return
@@ -23,6 +27,13 @@ def remove_from_clickable(scene_group, *sprites):
         if hasattr(sprite, 'on_click'):
             scene_group.clickables.remove(sprite)
 
+def reindex_clickable(*sprites):
+    "call after moving rects of sprites in place"
+    for sprite in sprites:
+        for group in sprite.groups():
+            if isinstance(group, ClickableGroup):
+                group.reindex(sprite)
+
 
 
 class Group(pygame.sprite.OrderedUpdates):
@@ -39,6 +50,23 @@ class Group(pygame.sprite.OrderedUpdates):
     def move_sprites(self, x, y):
         for sprite in self.sprites():
             sprite.rect.move_ip(x, y)
+        reindex_clickable(*self.sprites())
+
+    def render_sprites(self):
+        "sprites in drawing order"
+        return self.sprites()
+
+    def invalidate_render_list(self):
+        for group in self.parents:
+            group.invalidate_render_list()
+
+    def add_internal(self, sprite, *args):
+        super(Group, self).add_internal(sprite, *args)
+        self.invalidate_render_list()
+
+    def remove_internal(self, sprite, *args):
+        super(Group, self).remove_internal(sprite, *args)
+        self.invalidate_render_list()
 
     def add(self, *sprites):
         super(Group, self).add(*sprites)
@@ -52,6 +80,8 @@ class Group(pygame.sprite.OrderedUpdates):
 class CompositeGroup(object):
     def __init__(self, *groups):
         self.parents = set()
+        self.render_list = None
+        self.drawn_rects = []
         self.default_group = Group()
         self.default_group.parents.add(self)
         self.groups = []
@@ -65,12 +95,30 @@ class CompositeGroup(object):
         return None
 
     def move_sprites(self, x, y):
-        for sprite in self.sprites():
+        sprites = self.sprites()
+        for sprite in sprites:
             sprite.rect.move_ip(x, y)
+        reindex_clickable(*sprites)
 
     def get_groups(self):
         return self.groups + [self.default_group]
 
+    def render_sprites(self):
+        "sprites of all nested groups in drawing order. rebuilt only after the tree has changed"
+        if self.render_list is None:
+            render_list = []
+            for group in self.get_groups():
+                render_list.extend(group.render_sprites())
+            self.render_list = render_list
+        return self.render_list
+
+    def invalidate_render_list(self):
+        # parents of an invalid list are invalid already
+        if self.render_list is None: return
+        self.render_list = None
+        for group in self.parents:
+            group.invalidate_render_list()
+
     def add(self, *groups):
         for group in groups:
             if isinstance(group, pygame.sprite.Sprite):
@@ -78,7 +126,7 @@ class CompositeGroup(object):
             else:
                 group.parents.add(self)
                 self.groups.append(group)
-                self.needs_refresh_display = True
+        self.invalidate_render_list()
         add_to_clickable(self.scene_group(), *sprites_from_groups(groups))
 
     def remove(self, *groups):
@@ -89,21 +137,19 @@ class CompositeGroup(object):
             else:
                 group.parents.remove(self)
                 self.groups.remove(group)
-                self.needs_refresh_display = True
+        self.invalidate_render_list()
 
     def sprites(self):
         return sprites_from_groups(self.groups)
 
     def update(self):
-        for group in self.get_groups():
-            group.update()
+        for sprite in self.render_sprites():
+            sprite.update()
 
     def draw(self, screen):
-        dirty_rects = []
-        for group in self.get_groups():
-            rect = group.draw(screen)
-            if rect:
-                dirty_rects += rect
+        rects = [screen.blit(sprite.image, sprite.rect) for sprite in self.render_sprites()]
+        dirty_rects = self.drawn_rects + rects
+        self.drawn_rects = rects
 
         if self.needs_refresh_display:
             self.needs_refresh_display = False
@@ -120,8 +166,8 @@ class CompositeGroup(object):
         if self.needs_refresh_display:
             screen.blit(background, (0, 0))
         else:
-            for group in self.get_groups():
-                group.clear(screen, background)
+            for rect in self.drawn_rects:
+                screen.blit(background, rect, rect)
 
     def empty(self):
         self.remove(*self.groups)
@@ -133,9 +179,36 @@ class CompositeGroup(object):
 
 
 class SceneGroup(CompositeGroup):
-    def __init__(self, scene):
+    def __init__(self, scene, dirty = False):
         CompositeGroup.__init__(self)
-        self.clickables = ClickableGroup(scene)
+        self.clickables = ClickableGroup(scene, self)
+        self.renderer = DirtyRenderer() if dirty else None
+        self.render_order = {}
+        self.render_order_list = None
+
+    def get_render_order(self, sprite):
+        "z-order of sprite, or -1 if it is not drawn"
+        render_list = self.render_sprites()
+        if self.render_order_list is not render_list:
+            self.render_order = dict([(s, i) for i, s in enumerate(render_list)])
+            self.render_order_list = render_list
+        return self.render_order.get(sprite, -1)
+
+    def draw(self, screen):
+        if not self.renderer:
+            return CompositeGroup.draw(self, screen)
+
+        full = self.needs_refresh_display
+        self.needs_refresh_display = False
+        return self.renderer.draw(screen, self.background, self.render_sprites(), full)
+
+    def clear(self, screen, background = None):
+        if not self.renderer:
+            return CompositeGroup.clear(self, screen, background)
+
+        # dirty regions are cleared in draw()
+        if background:
+            self.background = background
 
     def update(self):
         CompositeGroup.update(self)
@@ -153,8 +226,118 @@ class SceneGroup(CompositeGroup):
         return self
     
 
+class DirtyRenderer(object):
+    "redraw only the regions where sprite images or rects have changed"
+
+    def __init__(self, full_ratio = DIRTY_FULL_REDRAW_RATIO):
+        self.full_ratio = full_ratio
+        self.states = {}
+        self.stats = { 'frames': 0, 'full': 0, 'rects': 0, 'blits': 0 }
+
+    def draw(self, screen, background, sprites, full = False):
+        self.stats['frames'] += 1
+
+        states = {}
+        dirty_rects = []
+        for sprite in sprites:
+            state = (sprite.image, tuple(sprite.rect))
+            states[sprite] = state
+            old_state = self.states.get(sprite)
+            if sprite.dirty or not old_state or old_state[0] is not state[0] or old_state[1] != state[1]:
+                sprite.dirty = False
+                dirty_rects.append(sprite.rect)
+                if old_state:
+                    dirty_rects.append(Rect(old_state[1]))
+
+        for sprite, state in self.states.iteritems():
+            if sprite not in states:
+                dirty_rects.append(Rect(state[1]))
+        self.states = states
+
+        screen_rect = screen.get_rect()
+        if not full:
+            dirty_rects = merge_rects([rect.clip(screen_rect) for rect in dirty_rects])
+            area = sum([rect.width * rect.height for rect in dirty_rects])
+            full = area > screen_rect.width * screen_rect.height * self.full_ratio
+
+        if full:
+            self.stats['full'] += 1
+            screen.blit(background, (0, 0))
+            for sprite in sprites:
+                screen.blit(sprite.image, sprite.rect)
+            self.stats['blits'] += len(sprites) + 1
+            return [screen_rect]
+
+        for rect in dirty_rects:
+            screen.set_clip(rect)
+            screen.blit(background, rect, rect)
+            self.stats['blits'] += 1
+            for sprite in sprites:
+                if sprite.rect.colliderect(rect):
+                    screen.blit(sprite.image, sprite.rect)
+                    self.stats['blits'] += 1
+        screen.set_clip(None)
+        self.stats['rects'] += len(dirty_rects)
+        return dirty_rects
+
+def merge_rects(rects):
+    "union overlapping rects until no two of them overlap"
+    merged = []
+    for rect in rects:
+        if not rect.width or not rect.height: continue
+        rect = Rect(rect)
+        i = 0
+        while i < len(merged):
+            if merged[i].colliderect(rect):
+                rect.union_ip(merged.pop(i))
+                i = 0
+            else:
+                i += 1
+        merged.append(rect)
+    return merged
+
+
+class GridIndex(object):
+    "uniform grid over rects for point queries"
+
+    def __init__(self, cell_size = CLICKABLE_GRID_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = {}
+
+    def add(self, item, rect):
+        self.remove(item)
+        rect = Rect(rect)
+        if not rect.width or not rect.height: return
+        self.rects[item] = rect
+        for cell in self.cells_for(rect):
+            self.cells.setdefault(cell, set()).add(item)
+
+    def remove(self, item):
+        if item not in self.rects: return
+        for cell in self.cells_for(self.rects.pop(item)):
+            self.cells[cell].discard(item)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        for x in xrange(rect.left // size, (rect.right - 1) // size + 1):
+            for y in xrange(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (x, y)
+
+    def query(self, (x, y)):
+        return self.cells.get((x // self.cell_size, y // self.cell_size), ())
+
+    def clear(self):
+        self.cells = {}
+        self.rects = {}
+
+
 class ClickableGroup(Group):
-    def __init__(self, listenable):
+    def __init__(self, listenable, scene_group = None):
+        self.index = GridIndex()
+        self.render_group = scene_group
         Group.__init__(self)
 
         self.overed_sprite = None
@@ -179,7 +362,7 @@ class ClickableGroup(Group):
             self.clicked_sprites = set()
 
         if self.needs_update_over:
-            overed = self.collidepoint(pygame.mouse.get_pos())
+            overed = self.collidepoint(rpg.event.get_mouse_pos())
 
             if self.overed_sprite and self.overed_sprite != overed:
                 if hasattr(self.overed_sprite, 'on_mouse_out'):
@@ -199,15 +382,34 @@ class ClickableGroup(Group):
             self.needs_update_over = False
 
     def collidepoint(self, p):
-        for sprite in self.sprites():
-            if sprite.rect.collidepoint(p):
-                return sprite
-        return False
+        "topmost clickable sprite at p"
+        found = False
+        found_order = -1
+        for sprite in self.index.query(p):
+            if not sprite.rect.collidepoint(p): continue
+            order = self.render_group.get_render_order(sprite) if self.render_group else 0
+            if order > found_order:
+                found = sprite
+                found_order = order
+        return found
+
+    def reindex(self, sprite):
+        if sprite in self:
+            self.index.add(sprite, sprite.rect)
+            self.needs_update_over = True
+
+    def add_internal(self, sprite, *args):
+        Group.add_internal(self, sprite, *args)
+        self.index.add(sprite, sprite.rect)
+
+    def remove_internal(self, sprite, *args):
+        Group.remove_internal(self, sprite, *args)
+        self.index.remove(sprite)
 
     def on_click(self, event):
         if event.button == MOUSE_BUTTON_RIGHT: return
 
-        clicked = self.collidepoint(pygame.mouse.get_pos())
+        clicked = self.collidepoint(rpg.event.get_mouse_pos())
         if clicked:
             self.now_clicked = True
             self.clicked_sprites.add(clicked)
@@ -240,6 +442,10 @@ class ClickableGroup(Group):
 
 
 class Sprite(pygame.sprite.Sprite):
+    # DirtyRenderer notices new image objects and moved rects by itself.
+    # call set_dirty() after drawing into the current image in place.
+    dirty = False
+
     def __init__(self, image = None, rect = None):
         pygame.sprite.Sprite.__init__(self)
         if isinstance(image, basestring):
@@ -254,10 +460,15 @@ class Sprite(pygame.sprite.Sprite):
     def sprites(self):
         return [self]
 
+    def set_dirty(self):
+        self.dirty = True
+
     def __setattr__(self, name, value):
         self.__dict__[name] = value
         if name == 'on_click':
             add_to_clickable(self.scene_group(), self)
+        elif name == 'rect':
+            reindex_clickable(self)
 
     def __delattr__(self, name):
         if name == 'on_click':
@@ -279,24 +490,42 @@ class Sprite(pygame.sprite.Sprite):
 
 class AnimationSprite(Sprite):
 
-    def __init__(self, image, num_frame, position = (0, 0), fps = 6, repeat = True):
+    def __init__(self, image, num_frame = None, position = (0, 0), fps = None, repeat = None):
         pygame.sprite.Sprite.__init__(self)
 
-        self.num_frame = num_frame
-        self.fps = fps
-        self.repeat = repeat
-        self.current_frame = 0
-
         if isinstance(image, basestring):
-            image = rpg.resource.image(image)
-        self.images = splitSurface(image, num_frame)
+            if num_frame:
+                self.sheet = rpg.sheet.strip(image, num_frame)
+            else:
+                self.sheet = rpg.sheet.get_sheet(image)
+            self.images = get_frames(self.sheet)
+        else:
+            self.sheet = None
+            self.images = tuple(splitSurface(image, num_frame))
+
+        self.num_frame = len(self.images)
+        self.durations = self.sheet.durations if self.sheet else rpg.sheet.frame_durations(6, self.num_frame)
+        self.repeat = self.sheet.loop if self.sheet else True
+        self.anchor = self.sheet.anchor if self.sheet else 'topleft'
+        if fps: self.set_fps(fps)
+        if repeat is not None: self.repeat = repeat
+
+        self.current_frame = 0
+        self.flipped = False
         self.image = self.images[self.current_frame]
         self.rect = self.image.get_rect().move(position)
 
         self.start()
 
+    def set_fps(self, fps):
+        self.durations = rpg.sheet.frame_durations(fps, self.num_frame)
+
     def flip(self):
-        self.images = [pygame.transform.flip(image, True, False) for image in self.images]
+        self.flipped = not self.flipped
+        if self.sheet:
+            self.images = get_frames(self.sheet, self.flipped)
+        else:
+            self.images = tuple([rpg.resource.flipped(image) for image in self.images])
         self.image = self.images[self.current_frame]
 
     def stop(self):
@@ -304,7 +533,7 @@ class AnimationSprite(Sprite):
 
     def start(self, on_finish_playing = None):
         self.playing = True
-        self.last_frame_tick = pygame.time.get_ticks()
+        self.last_frame_tick = rpg.clock.get_ticks()
 
         if on_finish_playing:
             self.on_finish_playing = on_finish_playing
@@ -317,35 +546,77 @@ class AnimationSprite(Sprite):
         if not self.playing:
             return
 
-        ms_per_frame = 1000.0 / self.fps
-        proceed = (pygame.time.get_ticks() - self.last_frame_tick) / ms_per_frame
-        if proceed >= 1:
-            frame = self.current_frame + (int)(math.floor(proceed))
+        elapsed = rpg.clock.get_ticks() - self.last_frame_tick
+        if self.repeat and self.current_frame == 0:
+            cycle = sum(self.durations)
+            self.last_frame_tick += cycle * (elapsed // cycle)
+            elapsed %= cycle
+
+        frame = self.current_frame
+        while elapsed >= self.durations[frame % self.num_frame]:
+            elapsed -= self.durations[frame % self.num_frame]
+            self.last_frame_tick += self.durations[frame % self.num_frame]
+            frame += 1
             if not self.repeat and frame >= self.num_frame:
                 self.set_current_frame(self.num_frame - 1)
                 self.stop()
                 if (hasattr(self, 'on_finish_playing')):
                     self.on_finish_playing()
                     del self.on_finish_playing
-            else:
-                self.last_frame_tick += ms_per_frame * (frame - self.current_frame)
-                self.set_current_frame(frame % self.num_frame)
+                return
+
+        if frame != self.current_frame:
+            self.set_current_frame(frame % self.num_frame)
 
     def set_current_frame(self, frame):
         self.current_frame = frame
         self.image = self.images[self.current_frame]
+        if self.image.get_size() != self.rect.size:
+            rect = self.image.get_rect()
+            setattr(rect, self.anchor, getattr(self.rect, self.anchor))
+            self.rect = rect
+
+# frame sets are shared by every sprite of the same sheet. dont modify them.
+frame_sets = {}
+frame_stats = { 'hits': 0, 'created': 0 }
+
+def get_frames(sheet, flipped = False):
+    key = (sheet.name, sheet.rects or sheet.num_frame, flipped)
+    if key in frame_sets:
+        frame_stats['hits'] += 1
+        return frame_sets[key]
+
+    if flipped:
+        frames = tuple([rpg.resource.flipped(frame) for frame in get_frames(sheet)])
+    else:
+        frames = tuple(cut_frames(rpg.resource.image(sheet.name), sheet.get_rects()))
+    frame_sets[key] = frames
+    frame_stats['created'] += 1
+    return frames
+
+def get_frame_stats():
+    stats = dict(frame_stats)
+    stats['count'] = len(frame_sets)
+    stats['bytes'] = sum([rpg.resource.surface_bytes(frame) for frames in frame_sets.values() for frame in frames])
+    return stats
+
+def clear_frames():
+    frame_sets.clear()
 
 def splitSurface(surface, num):
-    rect = surface.get_rect();
-    area = pygame.Rect(0, 0, rect.width / num, rect.height)
-    splitted = []
-    for i in range(0, num):
+    width = surface.get_width() / num
+    return cut_frames(surface, [(width * i, 0, width, surface.get_height()) for i in range(num)])
+
+def cut_frames(surface, rects):
+    colorkey = surface.get_at((0,0))
+    frames = []
+    for rect in rects:
+        area = pygame.Rect(rect)
         s = pygame.Surface(area.size)
         s.blit(surface, (0 , 0), area)
-        s.set_colorkey(surface.get_at((0,0)), RLEACCEL)
-        splitted.append(s.convert_alpha())
-        area.move_ip(rect.width / num, 0)
-    return splitted
+        s.set_colorkey(colorkey, RLEACCEL)
+        frames.append(s.convert_alpha())
+    return frames
 
 
 class Translate(object):
@@ -356,7 +627,7 @@ class Translate(object):
         self.duration = duration
         self.on_finish = on_finish
 
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = rpg.clock.get_ticks()
         self._is_finished = False
 
         self.sprite_update = self.sprite.update
@@ -368,7 +639,7 @@ class Translate(object):
 
         position = self.to_pos
 
-        ratio = (float)(pygame.time.get_ticks() - self.start_time) / self.duration
+        ratio = (float)(rpg.clock.get_ticks() - self.start_time) / self.duration
         if ratio < 1:
             position = (
                 (int)(self.from_pos[0] + (self.to_pos[0] - self.from_pos[0]) * ratio),
@@ -379,7 +650,7 @@ class Translate(object):
         if ratio >= 1:
             self.sprite.update = self.sprite_update
             self._is_finished = True
-            self.on_finish(rpg.event.Event(target = self))
+            self.on_finish(rpg.event.TypedEvent(target = self))
 
     def is_finished(self):
         return self._is_finished
@@ -5,14 +5,21 @@ from rpg.constants import *
 import rpg.model
 import rpg.job
 import rpg.event
+import rpg.ai
 
 EP_CHANGED = 'ep_changed'
 
+class EpChangedEvent(rpg.event.TypedEvent):
+    __slots__ = ('stage', 'team')
+    pool = []
+
 class Stage(rpg.event.EventDispatcher):    
+    event_classes = { EP_CHANGED: EpChangedEvent }
 
-    def __init__(self, enemies, first_team):
+    def __init__(self, enemies, first_team, ai = None):
         super(Stage, self).__init__()
         self.enemies = enemies
+        self.ai = ai
         self.actor = self.get_characters(first_team)[0]
         self.last_actors = {
             TEAM_PLAYER: None,
@@ -95,8 +102,9 @@ class Stage(rpg.event.EventDispatcher):
         self.dispatch(EP_CHANGED, stage=self, team=team)
 
     def create_command(self):
-        "override in subclass"
-        pass
+        "command of the enemy actor. override in subclass for stages without ai"
+        if self.ai:
+            return self.ai.create_command(self)
 
 
 class Stage1_1(Stage):
@@ -105,9 +113,12 @@ class Stage1_1(Stage):
             #rpg.character.Enemy(0, rpg.job.get_job('villager'), SEX_FEMALE),
             #rpg.character.Enemy(1, rpg.job.get_job('villager'), SEX_MALE),
             rpg.character.Enemy(0, rpg.job.get_job('cat'), SEX_FEMALE),
-        ], TEAM_PLAYER)
+        ], TEAM_PLAYER, rpg.ai.create(ENEMY_AI))
 
     def create_command(self):
+        if self.ai:
+            return super(Stage1_1, self).create_command()
+
         command = rpg.skill.get_skill('beat').create_command(self.get_actor())
         command.set_targets([self.get_target()])
         return command
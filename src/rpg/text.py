@@ -0,0 +1,152 @@
+# -*- coding:utf-8 -*-
+
+"rpg.text - draw text by blitting glyphs from a pre-rasterized atlas"
+
+import pygame
+from pygame.locals import *
+from rpg.constants import *
+import rpg.resource
+
+UI_TEXTS = [
+    u'スタート', u'クラス', u'スキル', u'クラススキル', u'習得スキル',
+    u'★☆●○', u'マスター！', u'レベルアップ！', u'を習得', u'になれる',
+]
+
+GLYPH = (255, 255, 255)
+BLANK = (0, 0, 0)
+
+class GlyphAtlas(object):
+    "white glyphs on black of one font packed into a single surface"
+
+    def __init__(self, font, width = GLYPH_ATLAS_WIDTH):
+        self.font = font
+        self.height = font.get_height()
+        self.surface = pygame.Surface((width, self.height * 4), 0, 32)
+        self.surface.fill(BLANK)
+        self.glyphs = {}
+        self.pen = [0, 0]
+        self.version = 0
+        self.tinted = {}
+        self.stats = { 'rasterized': 0, 'renders': 0, 'tints': 0 }
+
+    def add(self, chars):
+        for char in chars:
+            if char not in self.glyphs:
+                self.add_glyph(char)
+
+    def add_glyph(self, char):
+        glyph = self.font.render(char, False, GLYPH)
+        metrics = self.font.metrics(char)
+        advance = metrics[0][4] if metrics and metrics[0] else glyph.get_width()
+        self.stats['rasterized'] += 1
+
+        width = glyph.get_width()
+        if self.pen[0] + width > self.surface.get_width():
+            self.pen = [0, self.pen[1] + self.height]
+        if self.pen[1] + self.height > self.surface.get_height():
+            self.grow()
+
+        area = Rect(self.pen, (width, self.height))
+        self.surface.blit(glyph, area)
+        self.glyphs[char] = (area, advance)
+        self.pen[0] += width
+        self.version += 1
+
+    def grow(self):
+        surface = pygame.Surface((self.surface.get_width(), self.surface.get_height() * 2), 0, 32)
+        surface.fill(BLANK)
+        surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+    def tinted_surface(self, color):
+        "atlas with glyphs in color on a colorkey background"
+        tinted = self.tinted.get(color)
+        if tinted and tinted[0] == self.version:
+            return tinted[1]
+
+        key = (255, 0, 255) if color[:3] != (255, 0, 255) else (0, 255, 0)
+        surface = self.surface.copy()
+        pixels = pygame.PixelArray(surface)
+        pixels.replace(BLANK, key)
+        pixels.replace(GLYPH, color[:3])
+        del pixels
+        surface.set_colorkey(key)
+
+        self.tinted[color] = (self.version, surface)
+        self.stats['tints'] += 1
+        return surface
+
+    def size(self, text):
+        width = 0
+        pen = 0
+        for char in text:
+            area, advance = self.glyphs[char]
+            width = max(width, pen + area.width)
+            pen += advance
+        return (max(width, pen, 1), self.height)
+
+    def render(self, text, color = COLOR_FOREGROUND):
+        self.add(text)
+        self.stats['renders'] += 1
+
+        atlas = self.tinted_surface(rpg.resource.color_key(color))
+        key = atlas.get_colorkey()
+        surface = pygame.Surface(self.size(text), 0, atlas)
+        surface.fill(key)
+        surface.set_colorkey(key, RLEACCEL)
+
+        blits = []
+        pen = 0
+        for char in text:
+            area, advance = self.glyphs[char]
+            blits.append((atlas, (pen, 0), area))
+            pen += advance
+
+        # Surface.blits is only in newer pygame
+        if hasattr(surface, 'blits'):
+            surface.blits(blits, False)
+        else:
+            for blit in blits:
+                surface.blit(*blit)
+        return surface
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['glyphs'] = len(self.glyphs)
+        stats['bytes'] = rpg.resource.surface_bytes(self.surface)
+        return stats
+
+
+atlases = {}
+
+def get_atlas(small = False):
+    if small not in atlases:
+        atlases[small] = GlyphAtlas(rpg.resource.font(small))
+    return atlases[small]
+
+def render(text, color = COLOR_FOREGROUND, small = False):
+    return get_atlas(small).render(text, color)
+
+def game_characters():
+    "every character the game is known to draw"
+    import rpg.job
+    import rpg.skill
+
+    texts = [u''.join([unichr(c) for c in range(0x20, 0x7f)])] + UI_TEXTS
+    for job in rpg.job.get_jobs():
+        texts += [job.label, job.description]
+    for trait in rpg.job.get_traits():
+        texts.append(trait.description)
+    for skill in rpg.skill.get_skills():
+        texts += [skill.label, skill.description]
+    return set(u''.join(texts)) - set(u'\n')
+
+def warm_up(chars = None):
+    "pre-rasterize glyphs into both atlases. call after pygame.init()"
+    if chars is None:
+        chars = game_characters()
+    for small in (False, True):
+        get_atlas(small).add(sorted(chars))
+
+def get_stats():
+    return dict([('small' if small else 'normal', atlas.get_stats()) for small, atlas in atlases.items()])
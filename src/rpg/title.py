@@ -7,17 +7,19 @@ import rpg
 import rpg.scene
 import rpg.sprite
 import rpg.event
+import rpg.input
 import rpg.game
 import rpg.resource
+import rpg.preload
 
 class TitleScene(rpg.scene.Scene):
     def __init__(self):
         rpg.scene.Scene.__init__(self)
 
         self.characters = rpg.sprite.Group(
-            rpg.sprite.AnimationSprite('boy_walk.png', 4, (0, 0)),
-            rpg.sprite.AnimationSprite('girl_walk.png', 4, (20, 0)),
-            rpg.sprite.AnimationSprite('ninja_walk.png', 4, (40, 0))
+            rpg.sprite.AnimationSprite('boy_walk.png', position = (0, 0)),
+            rpg.sprite.AnimationSprite('girl_walk.png', position = (20, 0)),
+            rpg.sprite.AnimationSprite('ninja_walk.png', position = (40, 0))
         )
         self.characters.move_sprites(SCREEN_RECT.width, 200)
         self.button = self.create_start_button()
@@ -26,18 +28,40 @@ class TitleScene(rpg.scene.Scene):
         self.cursor.point(self.button)
         self.add_view(self.cursor)
 
+        self.progress = self.create_progress_bar()
+        if not rpg.preload.is_done():
+            self.add_view(self.progress)
+
     def create_start_button(self):
         button = rpg.sprite.Sprite()
-        button.image = rpg.resource.font().render(u'スタート', False, (0, 0, 0))
+        button.image = rpg.resource.text(u'スタート', (0, 0, 0))
         rect = button.image.get_rect()
         button.rect = rect.move((SCREEN_RECT.width - rect.width) / 2, 100)
         button.on_click = self.start_game
         return button
 
+    def create_progress_bar(self):
+        bar = rpg.sprite.Sprite()
+        bar.image = pygame.Surface((60, 2))
+        bar.image.fill(COLOR_MAX_HP)
+        bar.rect = bar.image.get_rect(midtop = (SCREEN_RECT.width / 2, self.button.rect.bottom + 6))
+        return bar
+
+    def update_progress_bar(self):
+        if not self.progress.is_displayed(): return
+        rpg.preload.poll()
+        if rpg.preload.is_done():
+            self.remove_view(self.progress)
+            return
+        width = int(self.progress.rect.width * rpg.preload.get_progress())
+        self.progress.image.fill(COLOR_REMAIN_HP, (0, 0, width, self.progress.rect.height))
+        self.progress.set_dirty()
+
     def update(self):
         rpg.scene.Scene.update(self)
+        self.update_progress_bar()
 
-        if rpg.event.is_key_down(*OK_KEYS):
+        if rpg.input.is_down(ACTION_OK):
             self.start_game()
             return
 
@@ -49,5 +73,6 @@ class TitleScene(rpg.scene.Scene):
             )
 
     def start_game(self, *args):
+        rpg.preload.wait()
         rpg.model.init()
         rpg.scene.switch_scene(rpg.game.GameScene)
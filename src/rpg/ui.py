@@ -11,11 +11,9 @@ import rpg.draw
 class CursorSprite(rpg.sprite.Sprite):
 
     def __init__(self, margin = 10, position = 'left'):
-        rpg.sprite.Sprite.__init__(self, 'cursor.png')
+        rpg.sprite.Sprite.__init__(self, rpg.resource.image('cursor.png', flip = position == 'right'))
         self.margin = margin
         self.position = position
-        if self.position == 'right':
-            self.image = pygame.transform.flip(self.image, True, False)
 
     def point(self, sprite):
         if self.position == 'left':
@@ -25,6 +23,9 @@ class CursorSprite(rpg.sprite.Sprite):
             self.rect.midleft = sprite.rect.midright
             self.rect.move_ip(self.margin, 0)
 
+class ButtonEvent(rpg.event.TypedEvent):
+    __slots__ = ('button', 'by_mouse')
+
 class RadioGroup(rpg.sprite.Group):
     def __init__(self, *buttons):
         self._buttons = []
@@ -113,7 +114,7 @@ class RadioGroup(rpg.sprite.Group):
     def invoke_event(self, event_name, **kwargs):
         handler_name = 'on_' + event_name
         if hasattr(self, handler_name):
-            getattr(self, handler_name)(rpg.event.Event(target = self, **kwargs))
+            getattr(self, handler_name)(ButtonEvent(event_name, self, **kwargs))
 
 
 class RadioTable(RadioGroup):
@@ -134,6 +135,7 @@ class RadioTable(RadioGroup):
             origin[0] + (button.rect.width + self.margin[0]) * (index % self.cols),
             origin[1] + (button.rect.height + self.margin[1]) * math.floor(index / self.cols)
         )
+        rpg.sprite.reindex_clickable(button)
 
     def up_button(self, button, loop = True):
         index = self.buttons().index(button) - self.cols
@@ -180,14 +182,18 @@ class RadioTable(RadioGroup):
     
 
 class RadioButton(rpg.sprite.Sprite):
+    LOOKS = ('plain', 'focused', 'selected')
+
     def __init__(self, label, rect, item = None, enabled = True):
-        rpg.sprite.Sprite.__init__(self, pygame.Surface(rect.size), rect)
+        rpg.sprite.Sprite.__init__(self, None, rect)
         self.label = label
         self.item = item
         self.enabled = enabled
         self.radio_group = None
         self.selected = False
         self.focused = False
+        self.state_images = {}
+        self.prerender()
         self.draw_image()
 
     def select(self):
@@ -217,16 +223,45 @@ class RadioButton(rpg.sprite.Sprite):
     def on_mouse_out(self, event):
         self.radio_group.unfocus(self)
 
+    def get_look(self):
+        if self.selected: return 'selected'
+        if self.focused: return 'focused'
+        return 'plain'
+
+    def get_state(self):
+        "key of the image for current state"
+        return (self.enabled, self.get_look())
+
+    def get_states(self):
+        "keys of the images to prerender"
+        return [(self.enabled, look) for look in self.LOOKS]
+
+    def prerender(self):
+        for state in self.get_states():
+            self.state_image(state)
+
+    def state_image(self, state):
+        if state not in self.state_images:
+            image = pygame.Surface(self.rect.size)
+            self.render_state(image, state)
+            self.state_images[state] = image
+        return self.state_images[state]
+
     def draw_image(self):
-        self.image.fill((255, 255, 255))
+        self.image = self.state_image(self.get_state())
+
+    def render_state(self, image, state):
+        enabled, look = state[:2]
+        image.fill((255, 255, 255))
 
-        if self.selected or self.focused:
-            border_color = (0, 0, 0) if self.selected else COLOR_DISABLED
-            rpg.draw.rounded_rect(self.image, self.image.get_rect().inflate(-2, -2), border_color = border_color)
+        if look != 'plain':
+            border_color = (0, 0, 0) if look == 'selected' else COLOR_DISABLED
+            rpg.draw.rounded_rect(image, image.get_rect().inflate(-2, -2), border_color = border_color)
 
-        label_color = (0, 0, 0) if self.enabled else COLOR_DISABLED
-        label_image = rpg.resource.font().render(self.label, False, label_color)
-        self.image.blit(label_image, (5, (self.rect.height - label_image.get_rect().height) / 2))
+        label_color = (0, 0, 0) if enabled else COLOR_DISABLED
+        label_image = rpg.resource.text(self.label, label_color)
+        image.blit(label_image, (5, (self.rect.height - label_image.get_rect().height) / 2))
+        return label_image
 
 
 class ToggleTable(RadioTable):